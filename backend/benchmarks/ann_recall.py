@@ -0,0 +1,94 @@
+"""
+Recall, latency and memory of the RAG index types and vector storages against the flat float32 baseline.
+
+Run from the backend directory, e.g.:
+    python -m benchmarks.ann_recall --sizes 10000 100000 1000000 --types ivf_flat ivf_pq hnsw
+    python -m benchmarks.ann_recall --types flat --storage float32 float16 sq8 pq
+
+Query-time parameters come from model.config (RAG_IVF_NPROBE, RAG_HNSW_EF_SEARCH, ...).
+"""
+import argparse
+import time
+import numpy as np
+import faiss
+from model.ann_index import INDEX_TYPES, STORAGE_TYPES, create_index
+
+def synthetic_corpus(n_vectors, dimension, n_clusters=256, seed=0, batch=100000):
+    """Clustered, L2-normalized vectors that roughly mimic sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dimension)).astype('float32')
+    vectors = np.empty((n_vectors, dimension), dtype='float32')
+    for start in range(0, n_vectors, batch):
+        end = min(start + batch, n_vectors)
+        labels = rng.integers(0, n_clusters, end - start)
+        vectors[start:end] = centers[labels] + 0.6 * rng.standard_normal((end - start, dimension)).astype('float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def synthetic_queries(corpus, n_queries, seed=1):
+    """Perturbed corpus vectors, so every query has close neighbours."""
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(corpus), n_queries, replace=False)
+    queries = corpus[picks] + 0.1 * rng.standard_normal((n_queries, corpus.shape[1])).astype('float32')
+    faiss.normalize_L2(queries)
+    return queries
+
+def recall_at_k(found, truth):
+    """Mean fraction of the true top-k that the index returned."""
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+def search_latencies(index, queries, k):
+    """Per-query latency in milliseconds for batch-size-1 searches."""
+    latencies = []
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def index_megabytes_per_million(index, n_vectors):
+    """Serialized index size scaled to one million chunks (close to its resident size)."""
+    return faiss.serialize_index(index).nbytes / n_vectors * 1e6 / (1024 * 1024)
+
+def run(sizes, index_types, storages, dimension, n_queries, k):
+    print(f"{'size':>9} {'type':>16} {'build s':>9} {'recall@' + str(k):>10} {'loss':>7} "
+          f"{'MB/1M':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for n_vectors in sizes:
+        corpus = synthetic_corpus(n_vectors, dimension)
+        queries = synthetic_queries(corpus, n_queries)
+        ids = np.arange(n_vectors, dtype='int64')
+
+        layouts = [("flat", "float32")] + [(t, s) for t in index_types for s in storages
+                                           if (t, s) != ("flat", "float32")]
+        for index_type, storage in layouts:
+            start = time.perf_counter()
+            index, index_kind, storage_kind = create_index(index_type, corpus, ids, storage)
+            build_seconds = time.perf_counter() - start
+
+            _, found = index.search(queries, k)
+            if (index_type, storage) == ("flat", "float32"):
+                truth = found
+            recall = recall_at_k(found, truth)
+            latencies = search_latencies(index, queries, k)
+            label = f"{index_kind}/{storage_kind}"
+            if (index_kind, storage_kind) != (index_type, storage):
+                label = f"{index_type}/{storage}->{label}"
+            print(f"{n_vectors:>9} {label:>16} {build_seconds:>9.2f} {recall:>10.4f} {1 - recall:>7.4f} "
+                  f"{index_megabytes_per_million(index, n_vectors):>9.1f} "
+                  f"{np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 99):>8.3f}")
+            del index
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=["ivf_flat", "ivf_pq", "hnsw"])
+    parser.add_argument("--storage", nargs="+", choices=STORAGE_TYPES, default=["float32"])
+    parser.add_argument("--dim", type=int, default=384, help="embedding dimension (all-MiniLM-L6-v2 is 384)")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    run(args.sizes, args.types, args.storage, args.dim, args.queries, args.k)
+
+if __name__ == "__main__":
+    main()
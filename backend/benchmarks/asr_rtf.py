@@ -0,0 +1,90 @@
+"""
+Real-time factor and word error rate of the ASR backends on a local sample set.
+
+The sample directory holds audio files (any format ffmpeg reads) each with a reference
+transcript next to it under the same name and a .txt extension, e.g. lecture01.mp3 + lecture01.txt.
+
+Run from the backend directory, e.g.:
+    python -m benchmarks.asr_rtf samples/ --backends whisper faster_whisper
+    python -m benchmarks.asr_rtf samples/ --backends faster_whisper --compute-types int8 int8_float32 float32
+
+RTF is processing time divided by audio duration (below 1 is faster than real time).
+Model loading is excluded from timing.
+"""
+import argparse
+import os
+import re
+import time
+from model.asr import ASR_BACKENDS, get_asr_backend
+from model.audio_stream import SAMPLE_RATE, load_pcm
+from model.config import Config
+from model.transcription_service import stream_segments
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".webm", ".ogg", ".flac", ".opus")
+
+def normalize_words(text):
+    """Lower-case words without punctuation, so WER counts recognition errors rather than formatting."""
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+def edit_distance(reference, hypothesis):
+    """Word-level Levenshtein distance (substitutions + deletions + insertions)."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1]
+
+def load_samples(sample_dir):
+    """(name, 16 kHz samples, reference words) for every audio file with a reference transcript."""
+    samples = []
+    for name in sorted(os.listdir(sample_dir)):
+        stem, extension = os.path.splitext(name)
+        reference_path = os.path.join(sample_dir, stem + ".txt")
+        if extension.lower() not in AUDIO_EXTENSIONS or not os.path.exists(reference_path):
+            continue
+        with open(reference_path, 'r', encoding='utf-8') as f:
+            reference = normalize_words(f.read())
+        samples.append((name, load_pcm(os.path.join(sample_dir, name)), reference))
+    return samples
+
+def run(sample_dir, backends, model_size, compute_types, window_seconds):
+    samples = load_samples(sample_dir)
+    if not samples:
+        raise SystemExit(f"No audio files with .txt references in {sample_dir}")
+    total_audio = sum(len(audio) for _, audio, _ in samples) / SAMPLE_RATE
+    print(f"{len(samples)} samples, {total_audio:.1f}s of audio")
+    print(f"{'backend':>32} {'load s':>8} {'RTF':>7} {'WER':>7}")
+
+    for name in backends:
+        # Only faster_whisper has a precision knob
+        for compute_type in compute_types if name == "faster_whisper" else [Config.ASR_COMPUTE_TYPE]:
+            backend = get_asr_backend(name, model_size, compute_type)
+            start = time.perf_counter()
+            backend.pin()
+            load_seconds = time.perf_counter() - start
+
+            elapsed, errors, reference_words = 0.0, 0, 0
+            for _, audio, reference in samples:
+                start = time.perf_counter()
+                text = " ".join(s["text"] for s in stream_segments(backend, audio, window_seconds))
+                elapsed += time.perf_counter() - start
+                errors += edit_distance(reference, normalize_words(text))
+                reference_words += len(reference)
+            label = f"{name}/{backend.model_id}"
+            print(f"{label:>32} {load_seconds:>8.2f} {elapsed / total_audio:>7.3f} "
+                  f"{errors / max(1, reference_words):>7.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sample_dir", help="directory of audio files with same-named .txt references")
+    parser.add_argument("--backends", nargs="+", choices=list(ASR_BACKENDS), default=["whisper", "faster_whisper"])
+    parser.add_argument("--model", default=Config.WHISPER_MODEL, help="Whisper model size")
+    parser.add_argument("--compute-types", nargs="+", default=["int8"], help="faster_whisper weight precisions")
+    parser.add_argument("--window", type=int, default=Config.STREAM_WINDOW_SECONDS, help="seconds of audio per ASR call")
+    args = parser.parse_args()
+    run(args.sample_dir, args.backends, args.model, args.compute_types, args.window)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import math
+import numpy as np
+import faiss
+from typing import Tuple
+from model.config import Config
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+# How vectors are stored inside the index: raw, half precision, 8-bit scalar quantized or product quantized
+STORAGE_TYPES = ("float32", "float16", "sq8", "pq")
+
+# Below these sizes the approximate indexes cannot be trained well and a flat scan is fast anyway
+MIN_ANN_VECTORS = 1000
+MIN_PQ_VECTORS = 10000
+
+# Upper bound on the number of vectors used to train IVF/PQ quantizers
+MAX_TRAIN_VECTORS = 100000
+
+# faiss wants about this many training points per IVF centroid and warns below it
+MIN_POINTS_PER_LIST = 39
+
+def ivf_nlist(n_vectors: int) -> int:
+    """
+    Number of IVF lists for a corpus of n_vectors (Config.IVF_NLIST, or ~4*sqrt(n)), capped so each list
+    gets at least MIN_POINTS_PER_LIST of the training vectors.
+    """
+    nlist = Config.IVF_NLIST or int(4 * math.sqrt(n_vectors))
+    n_train = min(n_vectors, MAX_TRAIN_VECTORS)
+    return max(1, min(nlist, n_train // MIN_POINTS_PER_LIST))
+
+def pq_m(dimension: int) -> int:
+    """Largest number of PQ sub-quantizers <= Config.PQ_M that divides the dimension."""
+    for m in range(min(Config.PQ_M, dimension), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+def effective_index_type(index_type: str, n_vectors: int) -> str:
+    """
+    Resolve the configured index type to the one actually built for a corpus size.
+
+    Args:
+        index_type: One of INDEX_TYPES.
+        n_vectors: Number of vectors to be indexed.
+
+    Returns:
+        The index type to build; approximate types degrade towards flat for small corpora.
+
+    Raises:
+        ValueError: If index_type is not a known type.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {', '.join(INDEX_TYPES)}")
+    if index_type == "flat" or n_vectors < MIN_ANN_VECTORS:
+        return "flat"
+    if index_type == "ivf_pq" and n_vectors < MIN_PQ_VECTORS:
+        return "ivf_flat"
+    return index_type
+
+def effective_storage(storage: str, index_kind: str, n_vectors: int) -> str:
+    """
+    Resolve the configured vector storage for an index kind and corpus size.
+
+    Raises:
+        ValueError: If storage is not a known type.
+    """
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown embedding storage '{storage}', expected one of {', '.join(STORAGE_TYPES)}")
+    if index_kind == "ivf_pq":
+        return "pq"
+    if storage == "pq" and n_vectors < MIN_PQ_VECTORS:
+        return "sq8"
+    return storage
+
+def _scalar_quantizer(storage: str):
+    return faiss.ScalarQuantizer.QT_fp16 if storage == "float16" else faiss.ScalarQuantizer.QT_8bit
+
+def supports_removal(index_kind: str) -> bool:
+    """HNSW graphs cannot delete vectors in place; every other type can."""
+    return index_kind != "hnsw"
+
+def configure_search(index: faiss.Index, index_kind: str) -> None:
+    """Apply the configured query-time parameters (nprobe / efSearch) to an index."""
+    params = faiss.ParameterSpace()
+    if index_kind in ("ivf_flat", "ivf_pq"):
+        params.set_index_parameter(index, "nprobe", Config.IVF_NPROBE)
+    elif index_kind == "hnsw":
+        params.set_index_parameter(index, "efSearch", Config.HNSW_EF_SEARCH)
+
+def estimate_index_bytes(index_kind: str, n_vectors: int, dimension: int, storage: str = "float32") -> int:
+    """Rough resident size of an id-mapped index, for memory budgeting."""
+    if storage == "pq" or index_kind == "ivf_pq":
+        code_bytes = pq_m(dimension) * Config.PQ_NBITS // 8
+    elif storage == "sq8":
+        code_bytes = dimension
+    elif storage == "float16":
+        code_bytes = dimension * 2
+    else:
+        code_bytes = dimension * 4
+    if index_kind == "hnsw":
+        code_bytes += Config.HNSW_M * 2 * 4  # level-0 graph links
+    # Each vector also carries its id in the inverted lists / IDMap and in the reverse id map
+    return n_vectors * (code_bytes + 8 + 32)
+
+def create_index(index_type: str, embeddings: np.ndarray, ids: np.ndarray,
+                 storage: str = Config.EMBEDDING_STORAGE) -> Tuple[faiss.Index, str, str]:
+    """
+    Build, train and fill an id-addressable FAISS index.
+
+    Args:
+        index_type: One of INDEX_TYPES.
+        embeddings: Normalized float32 vectors, one row per id.
+        ids: int64 ids for the rows of embeddings.
+        storage: One of STORAGE_TYPES; anything but float32 keeps only compressed codes in the index.
+
+    Returns:
+        Tuple of (index, index kind actually built, storage actually used).
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+    n_vectors, dimension = embeddings.shape
+    index_kind = effective_index_type(index_type, n_vectors)
+    storage = effective_storage(storage, index_kind, n_vectors)
+
+    if index_kind == "flat":
+        if storage == "float32":
+            base = faiss.IndexFlatL2(dimension)  # Using L2 distance
+        elif storage == "pq":
+            base = faiss.IndexPQ(dimension, pq_m(dimension), Config.PQ_NBITS)
+        else:
+            base = faiss.IndexScalarQuantizer(dimension, _scalar_quantizer(storage), faiss.METRIC_L2)
+    elif index_kind == "ivf_flat":
+        quantizer, nlist = faiss.IndexFlatL2(dimension), ivf_nlist(n_vectors)
+        if storage == "float32":
+            base = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+        elif storage == "pq":
+            base = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m(dimension), Config.PQ_NBITS)
+        else:
+            base = faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, _scalar_quantizer(storage))
+    elif index_kind == "ivf_pq":
+        base = faiss.IndexIVFPQ(faiss.IndexFlatL2(dimension), dimension, ivf_nlist(n_vectors),
+                                pq_m(dimension), Config.PQ_NBITS)
+    else:
+        if storage == "float32":
+            base = faiss.IndexHNSWFlat(dimension, Config.HNSW_M)
+        elif storage == "pq":
+            base = faiss.IndexHNSWPQ(dimension, pq_m(dimension), Config.HNSW_M)
+        else:
+            base = faiss.IndexHNSWSQ(dimension, _scalar_quantizer(storage), Config.HNSW_M)
+        base.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+
+    if not base.is_trained:
+        sample = embeddings
+        if n_vectors > MAX_TRAIN_VECTORS:
+            rng = np.random.default_rng(0)
+            sample = embeddings[np.sort(rng.choice(n_vectors, MAX_TRAIN_VECTORS, replace=False))]
+        base.train(sample)
+
+    index = faiss.IndexIDMap2(base)
+    index.add_with_ids(embeddings, np.asarray(ids, dtype='int64'))
+    configure_search(index, index_kind)
+    return index, index_kind, storage
@@ -0,0 +1,158 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from model.audio_stream import SAMPLE_RATE
+from model.config import Config
+from model.model_registry import get_whisper, registry
+from model.vad import split_on_silence
+
+class ASRBackend(ABC):
+    """
+    Speech recognizer that turns a chunk of 16 kHz mono float32 audio into timed segments.
+
+    Models are taken from the shared model registry, unless pin() was called (as pool workers do)
+    to keep a private copy loaded for the life of the process.
+    """
+
+    name = None
+
+    def __init__(self, model_size=Config.WHISPER_MODEL, compute_type=Config.ASR_COMPUTE_TYPE, cpu_threads=0):
+        """
+        Parameters:
+            model_size (str): Whisper model size (tiny, base, small, medium, large).
+            compute_type (str): Weight precision for engines that support it (int8, int8_float32, float32, ...).
+            cpu_threads (int): CPU threads for inference; 0 leaves the library default.
+        """
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self._model = None
+
+    @property
+    def model_id(self):
+        """Identifies the output this backend produces, e.g. for transcript cache keys."""
+        return self.model_size
+
+    def _load_model(self):
+        return None
+
+    def _shared_model(self):
+        return None
+
+    @property
+    def model(self):
+        return self._model if self._model is not None else self._shared_model()
+
+    def pin(self):
+        """Load a private copy of the model that stays loaded for the life of this object."""
+        self._model = self._load_model()
+
+    def load(self):
+        """Make sure the model is loaded before the first chunk arrives."""
+        return self.model
+
+    @abstractmethod
+    def _recognize(self, audio, initial_prompt):
+        """Recognize one chunk; returns segments with 'start' and 'end' relative to the chunk, and 'text'."""
+
+    def transcribe(self, audio, offset_seconds=0.0, initial_prompt=None):
+        """
+        Transcribes one chunk of audio and shifts its segment timestamps by the chunk's offset.
+
+        Parameters:
+            audio (np.ndarray): 16 kHz mono float32 samples.
+            offset_seconds (float): Position of the chunk in the whole recording.
+            initial_prompt (str): Text preceding the chunk, for backends that use context.
+
+        Returns:
+            tuple: (segments with absolute 'start' and 'end' and 'text', full text of the chunk).
+        """
+        segments = self._recognize(audio, initial_prompt)
+        for segment in segments:
+            segment["start"] += offset_seconds
+            segment["end"] += offset_seconds
+        return segments, "".join(segment["text"] for segment in segments)
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper in PyTorch (fp32 on CPU)."""
+
+    name = "whisper"
+
+    def _load_model(self):
+        import torch
+        import whisper
+        if self.cpu_threads:
+            torch.set_num_threads(self.cpu_threads)
+        return whisper.load_model(self.model_size)
+
+    def _shared_model(self):
+        return get_whisper(self.model_size)
+
+    def _recognize(self, audio, initial_prompt):
+        result = self.model.transcribe(audio, initial_prompt=initial_prompt)
+        return [{"start": s["start"], "end": s["end"], "text": s["text"]} for s in result.get("segments", [])]
+
+class FasterWhisperBackend(ASRBackend):
+    """Whisper on CTranslate2 (faster-whisper), with int8 weights by default for GPU-less boxes."""
+
+    name = "faster_whisper"
+
+    @property
+    def model_id(self):
+        return f"{self.model_size}/{self.compute_type}"
+
+    def _load_model(self):
+        from faster_whisper import WhisperModel
+        return WhisperModel(self.model_size, device=Config.ASR_DEVICE, compute_type=self.compute_type,
+                            cpu_threads=self.cpu_threads)
+
+    def _shared_model(self):
+        key = f"faster_whisper:{self.model_size}:{self.compute_type}"
+        # CTranslate2 models are not torch modules, so give the registry a size hint
+        registry.register(key, self._load_model, size_mb=Config.FASTER_WHISPER_MB.get(self.model_size))
+        return registry.get(key)
+
+    def _recognize(self, audio, initial_prompt):
+        segments, _ = self.model.transcribe(audio, initial_prompt=initial_prompt, beam_size=Config.ASR_BEAM_SIZE)
+        # segments is a lazy generator; decoding happens while iterating it
+        return [{"start": s.start, "end": s.end, "text": s.text} for s in segments]
+
+class GoogleBackend(ASRBackend):
+    """Google Web Speech API through speech_recognition, as in the legacy try.py path. No local model."""
+
+    name = "google"
+
+    @property
+    def model_id(self):
+        return Config.CAPTION_LANGUAGE
+
+    def _recognize(self, audio, initial_prompt):
+        import speech_recognition as sr
+        recognizer = sr.Recognizer()
+        segments = []
+        # The free endpoint rejects long requests, so send pieces cut at pauses
+        for start, end in split_on_silence(audio, SAMPLE_RATE, target_seconds=Config.GOOGLE_CHUNK_SECONDS * 0.6,
+                                           max_seconds=Config.GOOGLE_CHUNK_SECONDS):
+            pcm = (np.clip(audio[start:end], -1.0, 1.0) * 32767).astype('<i2').tobytes()
+            try:
+                text = recognizer.recognize_google(sr.AudioData(pcm, SAMPLE_RATE, 2), language=Config.CAPTION_LANGUAGE)
+            except sr.UnknownValueError:
+                continue
+            segments.append({"start": start / SAMPLE_RATE, "end": end / SAMPLE_RATE, "text": " " + text})
+        return segments
+
+ASR_BACKENDS = {backend.name: backend for backend in (WhisperBackend, FasterWhisperBackend, GoogleBackend)}
+
+def get_asr_backend(name=Config.ASR_BACKEND, model_size=Config.WHISPER_MODEL, compute_type=Config.ASR_COMPUTE_TYPE,
+                    cpu_threads=0):
+    """
+    Return the configured ASR backend.
+
+    Parameters:
+        name (str): One of ASR_BACKENDS: whisper, faster_whisper or google.
+        model_size (str): Whisper model size.
+        compute_type (str): Weight precision for faster_whisper.
+        cpu_threads (int): CPU threads for inference; 0 leaves the library default.
+    """
+    if name not in ASR_BACKENDS:
+        raise ValueError(f"Unknown ASR backend {name!r}; expected one of {', '.join(ASR_BACKENDS)}")
+    return ASR_BACKENDS[name](model_size, compute_type, cpu_threads)
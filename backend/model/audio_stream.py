@@ -0,0 +1,101 @@
+import subprocess
+import numpy as np
+import yt_dlp
+from model.vad import split_on_silence
+
+# Whisper and the speech_recognition path both work on 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+_SAMPLE_FORMATS = {"f32le": np.dtype("<f4"), "s16le": np.dtype("<i2")}
+
+def probe_audio_source(youtube_url):
+    """
+    Looks up a video's best audio stream without downloading anything.
+
+    Returns:
+        dict: 'url' of the stream, 'headers' ffmpeg must send to fetch it, and the 'duration'
+        in seconds (None when YouTube does not report it, e.g. for live streams).
+    """
+    ydl_opts = {'format': 'bestaudio/best', 'quiet': True, 'noplaylist': True}
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(youtube_url, download=False)
+    return {"url": info["url"], "headers": info.get("http_headers") or {}, "duration": info.get("duration")}
+
+def resolve_audio_source(youtube_url):
+    """
+    Looks up the direct URL of a video's best audio stream without downloading anything.
+
+    Returns:
+        tuple: (stream URL, dict of HTTP headers ffmpeg must send to fetch it).
+    """
+    source = probe_audio_source(youtube_url)
+    return source["url"], source["headers"]
+
+def ffmpeg_command(source, sample_format="f32le", headers=None):
+    """Builds an ffmpeg command that decodes any input to raw 16 kHz mono PCM on stdout."""
+    command = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+    if headers:
+        command += ["-headers", "".join(f"{key}: {value}\r\n" for key, value in headers.items())]
+    command += ["-i", source, "-f", sample_format, "-ac", "1", "-ar", str(SAMPLE_RATE), "-"]
+    return command
+
+def stream_pcm(source, headers=None, sample_format="f32le", block_seconds=1.0):
+    """
+    Decodes audio with ffmpeg and yields it as numpy blocks while it is still being fetched.
+
+    Parameters:
+        source (str): Local path or URL ffmpeg can read.
+        headers (dict): Optional HTTP headers for URL sources.
+        sample_format (str): "f32le" for float32 in [-1, 1] or "s16le" for int16.
+        block_seconds (float): Audio per yielded block.
+
+    Yields:
+        np.ndarray: Consecutive blocks of mono samples.
+    """
+    dtype = _SAMPLE_FORMATS[sample_format]
+    block_bytes = int(SAMPLE_RATE * block_seconds) * dtype.itemsize
+    process = subprocess.Popen(ffmpeg_command(source, sample_format, headers),
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            usable = len(data) - len(data) % dtype.itemsize
+            yield np.frombuffer(data[:usable], dtype=dtype)
+        process.wait()
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to decode audio: {process.stderr.read().decode(errors='replace').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+def load_pcm(source, headers=None, sample_format="f32le"):
+    """Decodes a whole input into one numpy array of 16 kHz mono samples."""
+    blocks = list(stream_pcm(source, headers, sample_format))
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=_SAMPLE_FORMATS[sample_format])
+
+def pcm_chunks(source, headers=None, target_seconds=60, max_seconds=None):
+    """
+    Decodes audio incrementally and yields chunks cut at pauses as soon as each one is complete,
+    holding at most about max_seconds of audio in memory.
+
+    Yields:
+        tuple: (offset of the chunk in samples, float32 samples of the chunk).
+    """
+    max_seconds = max_seconds or target_seconds * 1.5
+    max_samples = int(max_seconds * SAMPLE_RATE)
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = 0
+    for block in stream_pcm(source, headers):
+        buffer = np.concatenate([buffer, block])
+        while len(buffer) > max_samples:
+            _, end = split_on_silence(buffer, SAMPLE_RATE, target_seconds, max_seconds)[0]
+            yield offset, buffer[:end]
+            buffer = buffer[end:]
+            offset += end
+    for start, end in split_on_silence(buffer, SAMPLE_RATE, target_seconds, max_seconds) if len(buffer) else []:
+        yield offset + start, buffer[start:end]
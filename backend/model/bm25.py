@@ -0,0 +1,65 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import List, Tuple
+
+# Words and numbers, keeping math tokens such as "x^2", "3x", "4.2" and "f(x)" intact,
+# plus stand-alone operators so "x^2 + 3x + 2" still carries its structure
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.^_][a-z0-9]+)*(?:\([a-z0-9]+\))?|[+\-*/=<>^√π∑∫]")
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case lexical tokens of a text, math-aware."""
+    return _TOKEN_RE.findall(text.lower())
+
+class BM25Index:
+    """In-memory Okapi BM25 inverted index over a list of texts."""
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            texts: Documents to index; results refer to positions in this list.
+            k1: Term-frequency saturation.
+            b: Document-length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_lengths = []
+        for pos, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((pos, tf))
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Score documents against a query.
+
+        Args:
+            query: The search query.
+            top_k: Number of results to return.
+
+        Returns:
+            List of (document position, BM25 score), best first.
+        """
+        if not self.avg_length:
+            return []
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for pos, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[pos] / self.avg_length)
+                scores[pos] = scores.get(pos, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,139 @@
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from youtube_transcript_api import YouTubeTranscriptApi
+from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound, TooManyRequests
+from model.config import Config
+from model.rate_limit import TokenBucket, backoff_delay
+from model.transcript_store import TranscriptStore
+
+class RateLimited(Exception):
+    """The caption service asked us to slow down (HTTP 429/503)."""
+
+class TranscriptUnavailable(Exception):
+    """The caption service has no transcript for this video."""
+
+# Errors worth retrying after a pause, and errors that will not change on retry
+THROTTLE_ERRORS = (TooManyRequests, RateLimited)
+PERMANENT_ERRORS = (TranscriptsDisabled, NoTranscriptFound, TranscriptUnavailable)
+
+def youtube_captions(video_id):
+    """Fetch one video's captions from YouTube."""
+    return YouTubeTranscriptApi.get_transcript(video_id, languages=[Config.CAPTION_LANGUAGE])
+
+class HttpCaptionFetcher:
+    """
+    Fetches captions from an HTTP service answering GET <base_url>/transcripts/<video_id> with a JSON list
+    of {"text", "start", "duration"}: a caption mirror, or a local stub server for testing bulk ingestion.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        """
+        Parameters:
+            base_url (str): Root URL of the service, e.g. "http://127.0.0.1:8765".
+            timeout (float): Seconds to wait for each response.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def __call__(self, video_id):
+        params = urllib.parse.urlencode({"lang": Config.CAPTION_LANGUAGE})
+        url = f"{self.base_url}/transcripts/{urllib.parse.quote(video_id)}?{params}"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            if e.code in (429, 503):
+                raise RateLimited(f"HTTP {e.code} for {video_id}") from e
+            if e.code == 404:
+                raise TranscriptUnavailable(f"No transcript for {video_id}") from e
+            raise
+
+def default_fetcher():
+    """The caption mirror in Config.CAPTION_SERVER_URL when set, YouTube otherwise."""
+    return HttpCaptionFetcher(Config.CAPTION_SERVER_URL) if Config.CAPTION_SERVER_URL else youtube_captions
+
+def _fetch_with_retries(fetch, video_id, bucket, max_retries):
+    """
+    Fetch one video's captions under the shared rate limit, backing off with jitter while throttled.
+    A throttling response also pauses the bucket, so every worker slows down together.
+    """
+    attempt = 0
+    while True:
+        bucket.acquire()
+        try:
+            return fetch(video_id)
+        except THROTTLE_ERRORS:
+            if attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt, base=Config.CAPTION_BACKOFF_SECONDS)
+            print(f"Throttled on {video_id}; retrying in {delay:.1f}s")
+            bucket.pause(delay)
+            time.sleep(delay)
+            attempt += 1
+
+def bulk_ingest(video_ids, store=None, fetch=None, workers=Config.CAPTION_FETCH_WORKERS,
+                rate=Config.CAPTION_RATE_PER_SEC, burst=Config.CAPTION_BURST,
+                max_retries=Config.CAPTION_MAX_RETRIES, refetch=False):
+    """
+    Fetches captions for many videos concurrently into the transcript store.
+
+    Progress lives in the store itself: each video is committed as soon as it is fetched and videos
+    without a transcript are recorded as failures, so re-running an interrupted import only fetches what is
+    left. Videos that stayed throttled after every retry are not recorded and are fetched again next run.
+
+    Parameters:
+        video_ids (list): YouTube video IDs, e.g. a playlist.
+        store (TranscriptStore): Target store; defaults to the one at Config.TRANSCRIPT_DB_PATH.
+        fetch (callable): video_id -> list of {"text", "start", "duration"}; defaults to default_fetcher().
+        workers (int): Concurrent fetches.
+        rate (float): Requests per second shared by all workers.
+        burst (float): Requests allowed back to back before the rate applies.
+        max_retries (int): Retries per video while throttled.
+        refetch (bool): Fetch videos that are already stored or recorded as failed.
+
+    Returns:
+        dict: 'fetched' and 'skipped' counts, 'failed' {video_id: reason} and the 'throttled' video IDs.
+    """
+    store = store or TranscriptStore()
+    fetch = fetch or default_fetcher()
+    bucket = TokenBucket(rate, burst)
+
+    pending = list(dict.fromkeys(video_ids))
+    if not refetch:
+        done = set(store.video_ids()) | set(store.failed_ids())
+        pending = [video_id for video_id in pending if video_id not in done]
+    summary = {"fetched": 0, "skipped": len(set(video_ids)) - len(pending), "failed": {}, "throttled": []}
+    print(f"Fetching {len(pending)} transcripts with {workers} workers ({summary['skipped']} already done)")
+
+    def ingest(video_id):
+        try:
+            transcript = _fetch_with_retries(fetch, video_id, bucket, max_retries)
+            count = store.append(video_id, transcript)
+            print(f"✅ Transcript added for video: {video_id} ({count} segments)")
+            return video_id, "fetched", None
+        except THROTTLE_ERRORS as e:
+            print(f"❌ Still throttled for video {video_id}; will retry on the next run")
+            return video_id, "throttled", str(e)
+        except PERMANENT_ERRORS as e:
+            reason = type(e).__name__
+            store.mark_failed(video_id, reason)
+            print(f"❌ No transcript for video {video_id} ({reason}). Skipping...")
+            return video_id, "failed", reason
+        except Exception as e:
+            # Unknown errors are reported but not recorded, so the next run tries again
+            print(f"❌ Unexpected error for video {video_id}: {e}. Skipping...")
+            return video_id, "failed", str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for video_id, outcome, reason in executor.map(ingest, pending):
+            if outcome == "fetched":
+                summary["fetched"] += 1
+            elif outcome == "throttled":
+                summary["throttled"].append(video_id)
+            else:
+                summary["failed"][video_id] = reason
+    return summary
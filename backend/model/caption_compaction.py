@@ -0,0 +1,132 @@
+import math
+import re
+from typing import Any, Dict, List, Tuple
+from model.config import Config
+
+# (word, approximate start and end in seconds)
+TimedWord = Tuple[str, float, float]
+
+_NORMALIZE_RE = re.compile(r"[^\w']+")
+_SENTENCE_END = (".", "?", "!")
+
+def _norm(word: str) -> str:
+    """Comparison form of a caption word: lower case, no surrounding punctuation."""
+    return _NORMALIZE_RE.sub("", word.lower())
+
+def _is_word(token: str) -> bool:
+    return any(c.isalpha() for c in token)
+
+def estimate_tokens(word: str) -> int:
+    """Rough sub-word token count of a word for the embedding model (about four characters per token)."""
+    return max(1, math.ceil(len(word) / 4))
+
+def merge_rolling_captions(segments: List[Dict[str, Any]], min_overlap: int = 2, window: int = 50) -> List[TimedWord]:
+    """
+    Flatten caption segments into one word stream, dropping the part of each line that repeats the end
+    of the text before it (YouTube auto-captions roll, so consecutive lines overlap heavily).
+
+    Args:
+        segments: Caption segments with 'text', 'start' and 'duration' (or 'end').
+        min_overlap: Shortest overlap, in words, that is treated as a repeat; a whole repeated line always is,
+            unless it has no words (numbers, symbols).
+        window: How many trailing words of the stream are compared against each new line.
+
+    Returns:
+        Words with approximate start and end times, interpolated across each segment.
+    """
+    words: List[TimedWord] = []
+    for segment in segments:
+        line = segment.get("text", "").split()
+        if not line:
+            continue
+        start = float(segment.get("start", 0.0))
+        duration = segment.get("duration")
+        if duration is None:
+            duration = float(segment.get("end", start)) - start
+        line_norm = [_norm(w) for w in line]
+        tail_norm = [_norm(w) for w, _, _ in words[-window:]]
+
+        overlap = 0
+        for k in range(min(len(tail_norm), len(line_norm)), 0, -1):
+            if tail_norm[-k:] == line_norm[:k]:
+                # A short line fully repeated is a rolling repeat too, unless it is only numbers or symbols
+                if k >= min_overlap or (k == len(line_norm) and any(_is_word(w) for w in line)):
+                    overlap = k
+                break
+        step = duration / len(line)
+        for j in range(overlap, len(line)):
+            words.append((line[j], start + step * j, start + step * (j + 1)))
+    return words
+
+def remove_repeated_ngrams(words: List[TimedWord], max_n: int = Config.CAPTION_DEDUP_MAX_NGRAM) -> List[TimedWord]:
+    """
+    Drop immediate repetitions of 2..max_n word n-grams ("so we can so we can see" -> "so we can see"),
+    keeping the first occurrence and its timestamp. Single repeated words and n-grams containing numbers or
+    symbols are left alone, since "1 1 2 3" or "x x" can be exactly what the lecturer said.
+
+    >>> [w for w, _, _ in remove_repeated_ngrams([(w, 0.0, 0.0) for w in "so we can so we can see".split()])]
+    ['so', 'we', 'can', 'see']
+    >>> [w for w, _, _ in remove_repeated_ngrams([(w, 0.0, 0.0) for w in "1 0 0 1 1 2 3 5 8".split()])]
+    ['1', '0', '0', '1', '1', '2', '3', '5', '8']
+    >>> [w for w, _, _ in remove_repeated_ngrams([(w, 0.0, 0.0) for w in "x plus 2 x plus 2".split()])]
+    ['x', 'plus', '2', 'x', 'plus', '2']
+    """
+    for n in range(max_n, 1, -1):
+        kept: List[TimedWord] = []
+        for word in words:
+            kept.append(word)
+            if len(kept) >= 2 * n and all(_is_word(w[0]) for w in kept[-n:]) and \
+                    [_norm(w[0]) for w in kept[-n:]] == [_norm(w[0]) for w in kept[-2 * n:-n]]:
+                # The newest n words repeat the n before them; the repeat is complete only at its last word
+                del kept[-n:]
+        words = kept
+    return words
+
+def chunk_words(words: List[TimedWord], max_tokens: int = Config.CAPTION_CHUNK_TOKENS,
+                min_fill: float = 0.6, pause_seconds: float = 1.5) -> List[Dict[str, Any]]:
+    """
+    Re-segment a word stream into chunks of at most max_tokens estimated tokens, preferring to cut after a
+    sentence end or a pause once a chunk is min_fill full.
+
+    Returns:
+        Chunks shaped like caption segments: {"text", "start", "duration", "end"}.
+    """
+    chunks = []
+    current: List[TimedWord] = []
+    tokens = 0
+
+    def flush():
+        start, end = current[0][1], current[-1][2]
+        chunks.append({"text": " ".join(w for w, _, _ in current), "start": round(start, 3),
+                       "duration": round(end - start, 3), "end": round(end, 3)})
+
+    for i, (word, start, end) in enumerate(words):
+        word_tokens = estimate_tokens(word)
+        if current and tokens + word_tokens > max_tokens:
+            flush()
+            current, tokens = [], 0
+        current.append((word, start, end))
+        tokens += word_tokens
+        next_start = words[i + 1][1] if i + 1 < len(words) else None
+        natural_break = word.endswith(_SENTENCE_END) or (next_start is not None and next_start - end >= pause_seconds)
+        if natural_break and tokens >= min_fill * max_tokens:
+            flush()
+            current, tokens = [], 0
+    if current:
+        flush()
+    return chunks
+
+def compact_captions(segments: List[Dict[str, Any]], max_tokens: int = Config.CAPTION_CHUNK_TOKENS) -> List[Dict[str, Any]]:
+    """
+    Normalize raw captions before indexing: merge rolling overlaps, remove repeated n-grams and
+    re-segment into token-bounded chunks that keep their start and end timestamps.
+
+    Args:
+        segments: Caption segments as returned by youtube_transcript_api.
+        max_tokens: Upper bound on the estimated tokens of each chunk.
+
+    Returns:
+        Fewer, longer segments with 'text', 'start', 'duration' and 'end'.
+    """
+    words = remove_repeated_ngrams(merge_rolling_captions(segments))
+    return chunk_words(words, max_tokens)
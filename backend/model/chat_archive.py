@@ -0,0 +1,170 @@
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from bson import Binary, ObjectId
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
+from model.config import Config
+
+CODEC = "zstd"
+# Turns a rehydrated stub back into a live session
+REHYDRATED_SESSION = {"$set": {"archived": False},
+                      "$unset": {"archived_at": "", "archive_expires_at": "", "message_count": ""}}
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "$date" in value:
+            return datetime.fromisoformat(value["$date"])
+        if "$oid" in value:
+            return ObjectId(value["$oid"])
+    return value
+
+def pack_messages(messages: List[Dict[str, Any]], level: int = Config.CHAT_ARCHIVE_LEVEL) -> Tuple[bytes, int]:
+    """
+    Serialize chat_messages documents (with their _id and timestamps) into one zstd-compressed blob.
+
+    Returns:
+        The compressed blob and the size of the uncompressed JSON in bytes.
+    """
+    import zstandard
+    raw = json.dumps([{k: _encode_value(v) for k, v in m.items()} for m in messages],
+                     ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zstandard.ZstdCompressor(level=level).compress(raw), len(raw)
+
+def unpack_messages(blob: bytes, codec: str = CODEC) -> List[Dict[str, Any]]:
+    """Inverse of pack_messages()."""
+    if codec != CODEC:
+        raise ValueError(f"Unsupported chat archive codec: {codec!r}")
+    import zstandard
+    raw = zstandard.ZstdDecompressor().decompress(blob)
+    return [{k: _decode_value(v) for k, v in m.items()} for m in json.loads(raw)]
+
+def archived_query(chat_name: str) -> Dict[str, Any]:
+    """Filter matching the chat_history stub of chat_name while it is archived."""
+    return {"chat_name": chat_name, "archived": True}
+
+def archived_turns(record: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Turns stored in a chat_archive document (none when it has expired)."""
+    return unpack_messages(record["data"], record.get("codec", CODEC)) if record else []
+
+def only_duplicate_keys(error: PyMongoError) -> bool:
+    """Whether a failed unordered insert_many only skipped documents that were already there."""
+    details = getattr(error, "details", None) or {}
+    write_errors = details.get("writeErrors") or []
+    return bool(write_errors) and all(e.get("code") == 11000 for e in write_errors)
+
+class ChatArchive:
+    """
+    Cold storage for ended chat sessions. All turns of an archived session live as one compressed document in
+    chat_archive; its chat_history document stays as a small stub (archived: True) so the chat keeps its place
+    in the sidebar. Archives expire after Config.CHAT_ARCHIVE_TTL_DAYS, together with their stubs, through
+    MongoDB TTL indexes. Resuming an archived chat rehydrates its turns into chat_messages first.
+    """
+
+    def __init__(self, db, ttl_days: float = Config.CHAT_ARCHIVE_TTL_DAYS, level: int = Config.CHAT_ARCHIVE_LEVEL):
+        """
+        Args:
+            db: Database holding chat_history and chat_messages (the archive goes into its chat_archive collection).
+            ttl_days: Days an archived chat is kept; 0 keeps archives forever.
+            level: zstd compression level.
+        """
+        self.sessions = db.chat_history
+        self.messages = db.chat_messages
+        self.archive = db.chat_archive
+        self.ttl_days = ttl_days
+        self.level = level
+
+    def ensure_indexes(self) -> None:
+        """Create the TTL indexes that expire archives and their stubs (no-op when they already exist)."""
+        self.archive.create_index([("expires_at", ASCENDING)], name="expires_at", expireAfterSeconds=0)
+        try:
+            # Only stubs carry archive_expires_at, so live sessions are never touched
+            self.sessions.create_index([("archive_expires_at", ASCENDING)], name="archive_expires_at", expireAfterSeconds=0)
+        except OperationFailure as e:
+            print(f"Could not create the chat stub TTL index: {e}")
+
+    def is_archived(self, chat_name: str) -> bool:
+        return self.sessions.find_one(archived_query(chat_name), {"_id": 1}) is not None
+
+    def archive_chat(self, chat_name: str) -> Optional[Dict[str, int]]:
+        """
+        Move one session's turns into cold storage and shrink its chat_history document to a stub.
+        The archive is written before any turn is deleted, so an interrupted run loses nothing and can be repeated.
+
+        Returns:
+            {"messages", "raw_bytes", "stored_bytes"} for the archived session, or None if it is unknown or already archived.
+        """
+        session = self.sessions.find_one({"chat_name": chat_name}, {"archived": 1})
+        if session is None or session.get("archived"):
+            return None
+        turns = list(self.messages.find({"chat_name": chat_name}).sort([("timestamp", ASCENDING), ("_id", ASCENDING)]))
+        blob, raw_bytes = pack_messages(turns, self.level)
+        now = datetime.utcnow()
+        expires_at = now + timedelta(days=self.ttl_days) if self.ttl_days else None
+        self.archive.replace_one(
+            {"_id": chat_name},
+            {"_id": chat_name, "codec": CODEC, "data": Binary(blob), "message_count": len(turns),
+             "raw_bytes": raw_bytes, "archived_at": now, "expires_at": expires_at},
+            upsert=True
+        )
+        stub = {"archived": True, "archived_at": now, "message_count": len(turns), "ended": True}
+        if expires_at is not None:
+            stub["archive_expires_at"] = expires_at
+        self.sessions.update_one({"_id": session["_id"]}, {"$set": stub, "$unset": {"chat_pairs": "", "messages": ""}})
+        if turns:
+            self.messages.delete_many({"chat_name": chat_name, "_id": {"$in": [t["_id"] for t in turns]}})
+        return {"messages": len(turns), "raw_bytes": raw_bytes, "stored_bytes": len(blob)}
+
+    def archive_ended_sessions(self, idle_days: float = Config.CHAT_ARCHIVE_AFTER_DAYS, limit: int = 0) -> Dict[str, int]:
+        """
+        Archive every ended session that has been inactive for idle_days.
+
+        Args:
+            idle_days: Days since the session's last activity before it is archived.
+            limit: Archive at most this many sessions (0 for all), to spread the work over several runs.
+
+        Returns:
+            Totals over the run: {"sessions", "messages", "raw_bytes", "stored_bytes"}.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=idle_days)
+        query = {"ended": True, "archived": {"$ne": True}, "timestamp": {"$lt": cutoff}}
+        cursor = self.sessions.find(query, {"chat_name": 1, "_id": 0}).sort("timestamp", ASCENDING)
+        if limit:
+            cursor = cursor.limit(limit)
+        totals = {"sessions": 0, "messages": 0, "raw_bytes": 0, "stored_bytes": 0}
+        for session in list(cursor):
+            result = self.archive_chat(session["chat_name"])
+            if result is None:
+                continue
+            totals["sessions"] += 1
+            for key, value in result.items():
+                totals[key] += value
+        print(f"Archived {totals['sessions']} chat sessions ({totals['messages']} messages, "
+              f"{totals['raw_bytes']} -> {totals['stored_bytes']} bytes)")
+        return totals
+
+    def rehydrate(self, chat_name: str) -> int:
+        """
+        Restore an archived session's turns into chat_messages and turn its stub back into a live session.
+        Turns keep their original _id, so a repeated or concurrent rehydration does not duplicate them.
+
+        Returns:
+            Number of turns restored (0 when the archive has already expired).
+        """
+        turns = archived_turns(self.archive.find_one({"_id": chat_name}))
+        if turns:
+            try:
+                self.messages.insert_many(turns, ordered=False)
+            except BulkWriteError as e:
+                if not only_duplicate_keys(e):
+                    raise
+        self.sessions.update_one({"chat_name": chat_name}, REHYDRATED_SESSION)
+        self.archive.delete_one({"_id": chat_name})
+        return len(turns)
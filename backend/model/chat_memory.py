@@ -0,0 +1,104 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pymongo import ASCENDING, DESCENDING
+from model.chat_paging import newer_than
+from model.config import Config
+
+# summarize(previous_summary, turns) -> new summary, turns being {"human", "AI"} dicts oldest first
+Summarizer = Callable[[str, List[Dict[str, Any]]], str]
+
+def _clip(text: str, max_chars: int) -> str:
+    text = (text or "").strip()
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + " ..."
+
+def format_history(summary: str, turns: List[Dict[str, Any]], max_turn_chars: int = Config.CHAT_MEMORY_TURN_CHARS) -> str:
+    """
+    Render the conversation memory for the prompt: the summary of older turns, then the recent turns verbatim
+    (each message clipped to max_turn_chars, so one long answer cannot blow the prompt budget).
+    """
+    parts = []
+    if summary:
+        parts.append(f"Summary of the earlier conversation:\n{summary}")
+    if turns:
+        lines = []
+        for turn in turns:
+            lines.append(f"User: {_clip(turn.get('human'), max_turn_chars)}")
+            lines.append(f"Assistant: {_clip(turn.get('AI'), max_turn_chars)}")
+        parts.append("Recent messages:\n" + "\n".join(lines))
+    return "\n\n".join(parts)
+
+class ConversationMemory:
+    """
+    Rolling summary of the turns that have slid out of the recent-turns window of a chat.
+
+    The summary and a cursor to the last turn folded into it are kept on the chat_history document, so each
+    update only summarizes the turns added since the previous one. Updates happen once at least summary_every
+    turns are waiting, which keeps summarization to one LLM call per summary_every turns. Until then the
+    waiting turns stay in the prompt verbatim, so the prompt holds at most window + summary_every - 1 turns.
+    """
+
+    def __init__(self, db, summarize: Summarizer, window: int = Config.CHAT_MEMORY_TURNS,
+                 summary_every: int = Config.CHAT_SUMMARY_EVERY, max_summary_words: int = Config.CHAT_SUMMARY_MAX_WORDS):
+        """
+        Args:
+            db: Database holding chat_history and chat_messages.
+            summarize: Function folding turns into the previous summary (an LLM call).
+            window: Most recent turns sent verbatim, and so never summarized yet.
+            summary_every: Turns that must be waiting outside the window before the summary is recomputed.
+            max_summary_words: Hard cap on the stored summary, whatever the summarizer returns.
+        """
+        self.sessions = db.chat_history
+        self.messages = db.chat_messages
+        self.summarize = summarize
+        self.window = window
+        self.summary_every = max(1, summary_every)
+        self.max_summary_words = max_summary_words
+
+    @property
+    def max_turns(self) -> int:
+        """Most turns sent verbatim: the window plus the turns waiting to be summarized."""
+        return self.window + self.summary_every - 1
+
+    def summary(self, chat_name: str) -> str:
+        session = self.sessions.find_one({"chat_name": chat_name}, {"summary": 1, "_id": 0})
+        return (session or {}).get("summary", "")
+
+    def load(self, chat_name: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Memory of a chat: its summary, and every turn not yet folded into it (oldest first, at most max_turns).
+        """
+        session = self.sessions.find_one({"chat_name": chat_name}, {"summary": 1, "summary_cursor": 1, "_id": 0}) or {}
+        turns = list(self.messages.find(self._after(chat_name, session.get("summary_cursor")),
+                                        {"_id": 0, "human": 1, "AI": 1, "timestamp": 1})
+                     .sort([("timestamp", DESCENDING), ("_id", DESCENDING)]).limit(self.max_turns))
+        return session.get("summary", ""), turns[::-1]
+
+    def _after(self, chat_name: str, cursor: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {"chat_name": chat_name, **newer_than(cursor)}
+
+    def update(self, chat_name: str) -> bool:
+        """
+        Fold the turns that have left the recent window into the summary, once summary_every of them are waiting.
+
+        Returns:
+            True if the summary was recomputed.
+        """
+        session = self.sessions.find_one({"chat_name": chat_name}, {"summary": 1, "summary_cursor": 1})
+        if session is None:
+            return False
+        cursor = session.get("summary_cursor")
+        query = self._after(chat_name, cursor)
+        waiting = self.messages.count_documents(query) - self.window
+        if waiting < self.summary_every:
+            return False
+        turns = list(self.messages.find(query, {"human": 1, "AI": 1, "timestamp": 1})
+                     .sort([("timestamp", ASCENDING), ("_id", ASCENDING)]).limit(waiting))
+        summary = self.summarize(session.get("summary", ""), turns)
+        summary = " ".join(summary.split()[:self.max_summary_words])
+        last = turns[-1]
+        # Only if no concurrent update moved the cursor in the meantime; otherwise its summary stands
+        result = self.sessions.update_one(
+            {"_id": session["_id"], "summary_cursor": cursor},
+            {"$set": {"summary": summary, "summary_cursor": {"timestamp": last["timestamp"], "_id": last["_id"]}},
+             "$inc": {"summary_turns": len(turns)}}
+        )
+        return result.modified_count == 1
@@ -0,0 +1,99 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+
+# Position in a (timestamp, _id) ordering; _id breaks ties between documents written in the same millisecond.
+# Clients get it as an opaque string (encode_cursor); stored positions such as the summary cursor stay a dict.
+PageCursor = Dict[str, Any]
+
+OLDEST_FIRST = [("timestamp", ASCENDING), ("_id", ASCENDING)]
+NEWEST_FIRST = [("timestamp", DESCENDING), ("_id", DESCENDING)]
+# Fields returned for a history message and a sidebar chat
+MESSAGE_FIELDS = {"human": 1, "AI": 1, "timestamp": 1}
+CHAT_LIST_FIELDS = {"chat_name": 1, "video_id": 1, "timestamp": 1, "ended": 1}
+
+_ID_TYPES = {"oid": (ObjectId, str), "str": (str, str), "int": (int, int)}
+
+def encode_cursor(cursor: PageCursor) -> str:
+    """Opaque, URL-safe string for a cursor, so it survives a JSON/HTTP round trip with its BSON types intact."""
+    _id = cursor["_id"]
+    kind = next((k for k, (t, _) in _ID_TYPES.items() if type(_id) is t), None)
+    if kind is None:
+        raise TypeError(f"Cannot encode a page cursor for _id of type {type(_id).__name__}")
+    timestamp = cursor.get("timestamp")
+    payload = {"t": timestamp.isoformat() if timestamp is not None else None,
+               "i": _ID_TYPES[kind][1](_id), "k": kind}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+def decode_cursor(token: str) -> PageCursor:
+    """
+    Inverse of encode_cursor().
+
+    Raises:
+        ValueError: If token is not a cursor this module produced.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        kind = payload["k"]
+        _id = ObjectId(payload["i"]) if kind == "oid" else _ID_TYPES[kind][0](payload["i"])
+        timestamp = datetime.fromisoformat(payload["t"]) if payload["t"] is not None else None
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError(f"Invalid page cursor: {token!r}") from e
+    return {"timestamp": timestamp, "_id": _id}
+
+def page_cursor(document: Dict[str, Any]) -> str:
+    """Opaque cursor pointing at a document, for the next page of a (timestamp, _id) listing."""
+    return encode_cursor({"timestamp": document.get("timestamp"), "_id": document["_id"]})
+
+def _position(cursor: Union[str, PageCursor]) -> PageCursor:
+    return decode_cursor(cursor) if isinstance(cursor, str) else cursor
+
+def older_than(cursor: Optional[Union[str, PageCursor, datetime]]) -> Dict[str, Any]:
+    """
+    Query filter for documents strictly before cursor in (timestamp, _id) order.
+    A bare datetime (the cursor format of earlier versions) compares on timestamp alone.
+    """
+    if cursor is None:
+        return {}
+    if isinstance(cursor, datetime):
+        return {"timestamp": {"$lt": cursor}}
+    cursor = _position(cursor)
+    return {"$or": [{"timestamp": {"$lt": cursor["timestamp"]}},
+                    {"timestamp": cursor["timestamp"], "_id": {"$lt": cursor["_id"]}}]}
+
+def newer_than(cursor: Optional[Union[str, PageCursor]]) -> Dict[str, Any]:
+    """Query filter for documents strictly after cursor in (timestamp, _id) order."""
+    if cursor is None:
+        return {}
+    cursor = _position(cursor)
+    return {"$or": [{"timestamp": {"$gt": cursor["timestamp"]}},
+                    {"timestamp": cursor["timestamp"], "_id": {"$gt": cursor["_id"]}}]}
+
+def history_page(messages: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """
+    Shape the latest limit + 1 messages of a chat (oldest first) into a history page: "messages", the latest limit
+    of them without their _id, and "before", the cursor for the previous page (None when there is none).
+    """
+    has_more = len(messages) > limit
+    messages = messages[-limit:] if limit else []
+    cursor = page_cursor(messages[0]) if has_more and messages else None
+    for message in messages:
+        del message["_id"]
+    return {"messages": messages, "before": cursor}
+
+def chat_list_page(chats: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """
+    Shape up to limit + 1 chats (most recent first) into a sidebar page: "chats", the first limit of them without
+    their _id, and "before", the cursor for the next page (None on the last page).
+    """
+    has_more = len(chats) > limit
+    chats = chats[:limit]
+    cursor = page_cursor(chats[-1]) if has_more and chats else None
+    for chat in chats:
+        del chat["_id"]
+    return {"chats": chats, "before": cursor}
@@ -0,0 +1,269 @@
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo.errors import BulkWriteError, PyMongoError
+from model.chat_archive import REHYDRATED_SESSION, archived_query, archived_turns, only_duplicate_keys
+from model.chat_paging import (CHAT_LIST_FIELDS, MESSAGE_FIELDS, NEWEST_FIRST, OLDEST_FIRST, chat_list_page,
+                               history_page, newer_than, older_than)
+from model.config import Config
+
+def create_motor_client(uri: str = Config.MONGO_URI):
+    """Async MongoDB client with a connection pool sized for concurrent request handlers."""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(
+        uri,
+        maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+        minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=Config.MONGO_MAX_IDLE_MS,
+        serverSelectionTimeoutMS=Config.MONGO_TIMEOUT_MS,
+        retryWrites=True,
+    )
+
+class ChatWriteBehind:
+    """
+    Bounded queue of chat turns written to MongoDB in batches by a background task, off the response path.
+
+    A full queue makes enqueue() wait, so a stalled database slows requests down instead of growing memory.
+    close() drains everything still queued, without waiting for partial batches to fill, before returning.
+    """
+
+    def __init__(self, db, max_queue: int = Config.CHAT_WRITE_QUEUE_SIZE, batch_size: int = Config.CHAT_WRITE_BATCH_SIZE,
+                 flush_ms: float = Config.CHAT_WRITE_FLUSH_MS, max_retries: int = 5):
+        """
+        Args:
+            db: Async database (motor, or an in-memory stand-in with the same collection API).
+            max_queue: Turns that may wait to be written before enqueue() blocks.
+            batch_size: Largest insert_many batch.
+            flush_ms: How long the writer waits for a batch to fill after the first turn arrives.
+            max_retries: Attempts per batch before its turns are reported as lost.
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self.max_retries = max_retries
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._pending: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = asyncio.Event()
+        self.written = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._closing.clear()
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="chat-write-behind")
+
+    async def enqueue(self, message: Dict[str, Any]) -> None:
+        """Queue one chat_messages document; returns as soon as it is queued."""
+        self.start()
+        self._pending[message["chat_name"]] += 1
+        await self._queue.put(message)
+
+    def has_pending(self, chat_name: str) -> bool:
+        return self._pending[chat_name] > 0
+
+    async def flush(self) -> None:
+        """Wait until every turn queued so far has been written."""
+        if self._task is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """Write everything still queued, then stop the background task."""
+        self._closing.set()
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            if self._closing.is_set():
+                # Shutting down: write what is queued now instead of waiting for the batch to fill
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            get = asyncio.ensure_future(self._queue.get())
+            closing = asyncio.ensure_future(self._closing.wait())
+            done, _ = await asyncio.wait({get, closing}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            closing.cancel()
+            if get in done:
+                batch.append(get.result())
+            else:
+                # A cancelled get leaves its turn in the queue
+                get.cancel()
+                if closing not in done:
+                    break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            except Exception as e:
+                # Keep the writer alive: if it stopped, the full queue would block every request
+                self.dropped += len(batch)
+                print(f"❌ Dropped {len(batch)} chat turns: {e}")
+            finally:
+                for message in batch:
+                    self._pending[message["chat_name"]] -= 1
+                    self._queue.task_done()
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        # Last activity per chat, so each session document is touched once per batch
+        latest: Dict[str, datetime] = {}
+        for message in batch:
+            latest[message["chat_name"]] = max(latest.get(message["chat_name"], message["timestamp"]), message["timestamp"])
+        for attempt in range(self.max_retries):
+            try:
+                # Retries may re-insert turns that made it the first time; they carry their _id, so duplicates are skipped
+                await self.db.chat_messages.insert_many(batch, ordered=False)
+                await self._touch_sessions(latest)
+                self.written += len(batch)
+                return
+            except PyMongoError as e:
+                if only_duplicate_keys(e):
+                    await self._touch_sessions(latest)
+                    self.written += len(batch)
+                    return
+                print(f"Chat write failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+                await asyncio.sleep(min(5.0, 0.2 * 2 ** attempt))
+        self.dropped += len(batch)
+        print(f"❌ Dropped {len(batch)} chat turns after {self.max_retries} failed writes")
+
+    async def _touch_sessions(self, latest: Dict[str, datetime]) -> None:
+        # $max keeps a session's timestamp from moving backwards when batches for it complete out of order
+        for chat_name, timestamp in latest.items():
+            await self.db.chat_history.update_one({"chat_name": chat_name}, {"$max": {"timestamp": timestamp}}, upsert=True)
+
+def new_session(chat_name: str, video_id: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Session id and upsert update for a chat that may not exist yet; $setOnInsert leaves an existing session as is,
+    so concurrent creates on the unique chat_name index cannot both insert.
+    """
+    now = datetime.utcnow()
+    session_id = str(now.timestamp())
+    return session_id, {"$setOnInsert": {"session_id": session_id, "chat_name": chat_name, "video_id": video_id,
+                                         "timestamp": now, "ended": False}}
+
+class AsyncChatStore:
+    """
+    Async access to the chat collections (same documents as model.chatbot), with turns written behind.
+    Pass db to run against a local mongod database or an in-memory stand-in such as mongomock_motor.
+    """
+
+    def __init__(self, db=None):
+        """
+        Args:
+            db: Async database; defaults to Config.MONGO_DB on a pooled motor client.
+        """
+        self.db = db if db is not None else create_motor_client()[Config.MONGO_DB]
+        self.writer = ChatWriteBehind(self.db)
+
+    async def create_or_get_chat(self, chat_name: str, video_id: Optional[str] = None):
+        """Create a chat session if it doesn't exist (same result shape as model.chatbot.create_or_get_chat)."""
+        session_id, update = new_session(chat_name, video_id)
+        result = await self.db.chat_history.update_one({"chat_name": chat_name}, update, upsert=True)
+        if result.upserted_id is None:
+            return (await self.db.chat_history.find_one({"chat_name": chat_name}, {"session_id": 1}))["session_id"]
+        return ("Chat Created Successfully", session_id)
+
+    async def record_turn(self, chat_name: str, user_message: str, ai_message: str) -> None:
+        """Queue a chat turn for the background writer."""
+        from bson import ObjectId
+        await self.writer.enqueue({"_id": ObjectId(), "chat_name": chat_name, "human": user_message,
+                                   "AI": ai_message, "timestamp": datetime.utcnow()})
+
+    async def get_chat_video_id(self, chat_name: str) -> Optional[str]:
+        session_data = await self.db.chat_history.find_one({"chat_name": chat_name}, {"video_id": 1, "_id": 0})
+        return session_data.get("video_id") if session_data else None
+
+    async def load_memory(self, chat_name: str, max_turns: int) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Conversation memory (see model.chat_memory.ConversationMemory.load): the rolling summary, and the
+        turns not yet folded into it, oldest first and at most max_turns.
+        """
+        if self.writer.has_pending(chat_name):
+            await self.writer.flush()
+        if await self.db.chat_history.find_one(archived_query(chat_name), {"_id": 1}):
+            await self.rehydrate(chat_name)
+        session = await self.db.chat_history.find_one({"chat_name": chat_name},
+                                                       {"summary": 1, "summary_cursor": 1, "_id": 0}) or {}
+        query = {"chat_name": chat_name, **newer_than(session.get("summary_cursor"))}
+        cursor = self.db.chat_messages.find(query, {"_id": 0, **MESSAGE_FIELDS}).sort(NEWEST_FIRST).limit(max_turns)
+        turns = await cursor.to_list(length=max_turns)
+        return session.get("summary", ""), turns[::-1]
+
+    async def resume_chat_session(self, chat_name: str, limit: Optional[int] = None,
+                                  before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Past messages of a session, oldest first, including turns still queued and archived turns."""
+        messages = await self._find_messages(chat_name, limit, before)
+        for message in messages:
+            del message["_id"]
+        return messages
+
+    async def resume_chat_page(self, chat_name: str, limit: int = Config.CHAT_PAGE_SIZE,
+                               before: Optional[str] = None) -> Dict[str, Any]:
+        """One page of a session's history, with an opaque cursor for the previous page (see model.chatbot.resume_chat_page)."""
+        return history_page(await self._find_messages(chat_name, limit + 1, before), limit)
+
+    async def _find_messages(self, chat_name: str, limit: Optional[int], before: Optional[str]) -> List[Dict[str, Any]]:
+        # Messages oldest first, with their _id for page cursors
+        if self.writer.has_pending(chat_name):
+            await self.writer.flush()
+        if await self.db.chat_history.find_one(archived_query(chat_name), {"_id": 1}):
+            await self.rehydrate(chat_name)
+        query = {"chat_name": chat_name, **older_than(before)}
+        if limit is None:
+            return await self.db.chat_messages.find(query, MESSAGE_FIELDS).sort(OLDEST_FIRST).to_list(length=None)
+        cursor = self.db.chat_messages.find(query, MESSAGE_FIELDS).sort(NEWEST_FIRST).limit(limit)
+        return (await cursor.to_list(length=limit))[::-1]
+
+    async def rehydrate(self, chat_name: str) -> int:
+        """Restore an archived session into chat_messages (async counterpart of ChatArchive.rehydrate)."""
+        turns = archived_turns(await self.db.chat_archive.find_one({"_id": chat_name}))
+        if turns:
+            try:
+                await self.db.chat_messages.insert_many(turns, ordered=False)
+            except BulkWriteError as e:
+                if not only_duplicate_keys(e):
+                    raise
+        await self.db.chat_history.update_one({"chat_name": chat_name}, REHYDRATED_SESSION)
+        await self.db.chat_archive.delete_one({"_id": chat_name})
+        return len(turns)
+
+    async def list_chats(self, limit: int = Config.CHAT_PAGE_SIZE, before: Optional[str] = None) -> Dict[str, Any]:
+        """One page of the chat sidebar, most recently active first, with an opaque next-page cursor
+        (see model.chatbot.list_chats)."""
+        cursor = self.db.chat_history.find(older_than(before), CHAT_LIST_FIELDS).sort(NEWEST_FIRST).limit(limit + 1)
+        return chat_list_page(await cursor.to_list(length=limit + 1), limit)
+
+    async def close(self) -> None:
+        """Flush queued turns; call on shutdown so no answered turn is lost."""
+        await self.writer.close()
+
+_store: Optional[AsyncChatStore] = None
+
+def get_chat_store() -> AsyncChatStore:
+    """The process-wide async chat store (create it from inside the server's event loop)."""
+    global _store
+    if _store is None:
+        _store = AsyncChatStore()
+    return _store
+
+async def close_chat_store() -> None:
+    """Flush and release the process-wide store, e.g. from the server's lifespan shutdown."""
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
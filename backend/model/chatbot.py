@@ -1,18 +1,76 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.memory import ConversationBufferMemory
 from langchain.chains import ConversationChain
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, MongoClient
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from dotenv import load_dotenv
-from model.conversation import conversation
+from model.config import Config
+from model.conversation import conversation, summarize_history
+from model.chat_memory import ConversationMemory, format_history
+from model.chat_store import get_chat_store, new_session
+from model.chat_archive import ChatArchive, only_duplicate_keys
+from model.chat_paging import CHAT_LIST_FIELDS, MESSAGE_FIELDS, NEWEST_FIRST, OLDEST_FIRST, chat_list_page, history_page, older_than
 import os
 import json
 load_dotenv()
 
 # MongoDB Connection
-client = MongoClient("mongodb://localhost:27017/")
-db = client.chatbot_db
+client = MongoClient(Config.MONGO_URI)
+db = client[Config.MONGO_DB]
+# One document per chat session (name, video, timestamps); its turns live in chat_messages
 chat_collection = db.chat_history
+# One document per turn {chat_name, human, AI, timestamp}, so sessions never approach the 16 MB document limit
+message_collection = db.chat_messages
+# Ended sessions in compressed cold storage (chat_archive), leaving a stub in chat_history
+chat_archive = ChatArchive(db)
+# Rolling summary of the turns older than the last Config.CHAT_MEMORY_TURNS, stored on the session document
+chat_memory = ConversationMemory(db, summarize_history)
+# Summaries are recomputed off the response path, one at a time
+_summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-summary")
+
+def ensure_indexes():
+    """Create the indexes the chat queries rely on at startup (no-op when they already exist)."""
+    # History pages are cut on (timestamp, _id), so turns written in the same millisecond are never skipped
+    message_collection.create_index([("chat_name", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+                                    name="chat_name_timestamp_id")
+    _drop_index(message_collection, "chat_name_timestamp")  # prefix of the index above
+    # Sidebar listing pages by recency on (timestamp, _id), so chats active in the same millisecond are not skipped
+    chat_collection.create_index([("timestamp", DESCENDING), ("_id", DESCENDING)], name="timestamp_id")
+    _drop_index(chat_collection, "timestamp")  # prefix of the index above
+    try:
+        chat_collection.create_index([("chat_name", ASCENDING)], name="chat_name", unique=True)
+    except OperationFailure as e:
+        # Older data may hold duplicate names; fall back to a plain index until they are cleaned up
+        print(f"Could not create unique chat_name index ({e}); using a non-unique one")
+        chat_collection.create_index([("chat_name", ASCENDING)], name="chat_name_lookup")
+    chat_archive.ensure_indexes()
+
+def _drop_index(collection, name):
+    try:
+        collection.drop_index(name)
+    except OperationFailure:
+        pass  # already gone
+
+def init_chat_db():
+    """
+    Prepare the chat database: create the indexes and move sessions still in the old embedded format into
+    chat_messages (until then they would resume empty). Call once from the server's startup hook, e.g.
+    a FastAPI lifespan; it needs MongoDB reachable, so it is not done at import.
+
+    Returns:
+        bool: Whether the database is ready.
+    """
+    try:
+        ensure_indexes()
+        migrate_embedded_messages()
+        return True
+    except PyMongoError as e:
+        print(f"Could not prepare the chat database: {e}")
+        return False
 
 # # Gemini AI Model
 # llm = ChatGoogleGenerativeAI(model="gemini-pro", google_api_key=os.getenv("GEMINI_API_KEY"))
@@ -21,19 +79,13 @@ chat_collection = db.chat_history
 # memory = ConversationBufferMemory(k=3)
 # conversation = ConversationChain(llm=llm, memory=memory, verbose=True)
 
-def create_or_get_chat(chat_name):
+def create_or_get_chat(chat_name, video_id=None):
     """Create a new chat session if it doesn't exist, else return existing session."""
-    session_data = chat_collection.find_one({"chat_name": chat_name})
-    if session_data:
-        return session_data["session_id"]
-    session_id = str(datetime.utcnow().timestamp())
-    chat_collection.insert_one({
-        "session_id": session_id,
-        "chat_name": chat_name,
-        "messages": [],
-        "timestamp": datetime.utcnow(),
-        "ended": False
-    })
+    # A single upsert on the unique chat_name index, so two concurrent creates cannot both insert
+    session_id, update = new_session(chat_name, video_id)
+    result = chat_collection.update_one({"chat_name": chat_name}, update, upsert=True)
+    if result.upserted_id is None:
+        return chat_collection.find_one({"chat_name": chat_name}, {"session_id": 1})["session_id"]
     return ("Chat Created Successfully",session_id)
 
 # def load_past_conversations(chat_name):
@@ -46,56 +98,191 @@ def create_or_get_chat(chat_name):
 
 def store_chat_in_mongo(chat_name, user_message, ai_message):
     """Store the conversation messages in MongoDB."""
+    now = datetime.utcnow()
+    message_collection.insert_one({
+        "chat_name": chat_name,
+        "human": user_message,
+        "AI": ai_message,
+        "timestamp": now
+    })
     chat_collection.update_one(
         {"chat_name": chat_name},
-        {
-            "$push": {
-                "messages": {
-                    "human": user_message,
-                    "AI": ai_message,
-                    "timestamp": datetime.utcnow()
-                }
-            },
-            "$set": {"timestamp": datetime.utcnow()}
-        },
+        {"$set": {"timestamp": now}},
         upsert=True
     )
 
 def end_chat_session(chat_name):
-    """Mark the session as ended and store conversation in paired {human, AI} format."""
-    session_data = chat_collection.find_one({"chat_name": chat_name})
-    if session_data and "messages" in session_data:
-        chat_pairs = [
-            {"human": msg["human"], "AI": msg["AI"]}
-            for msg in session_data["messages"]
-        ]
-        chat_collection.update_one(
-            {"chat_name": chat_name},
-            {
-                "$set": {
-                    "chat_pairs": chat_pairs,
-                    "ended": True,
-                    "timestamp": datetime.utcnow()
-                }
-            }
-        )
-
-def resume_chat_session(chat_name):
-    """Fetch all past messages from a session."""
-    session_data = chat_collection.find_one({"chat_name": chat_name})
-    return session_data["messages"] if session_data and "messages" in session_data else []
-
-def fetch_all_chat_names():
-    chat_names = [chat["chat_name"] for chat in chat_collection.find({}, {"chat_name": 1, "_id": 0})]
+    """
+    Mark the session as ended. Its turns stay in chat_messages until archive_ended_chats() moves them
+    to cold storage; no second copy is kept on the session document.
+    """
+    chat_collection.update_one(
+        {"chat_name": chat_name},
+        {
+            "$set": {"ended": True, "timestamp": datetime.utcnow()},
+            # Drop the copy older versions kept here
+            "$unset": {"chat_pairs": ""}
+        }
+    )
+
+def archive_ended_chats(idle_days=Config.CHAT_ARCHIVE_AFTER_DAYS, limit=0):
+    """Move ended sessions idle for idle_days into compressed cold storage; run periodically (e.g. daily)."""
+    return chat_archive.archive_ended_sessions(idle_days, limit)
+
+def resume_chat_session(chat_name, limit=None, before=None):
+    """
+    Fetch past messages of a session, oldest first (rehydrating it first if it was archived).
+
+    Parameters:
+        chat_name (str): The session's name.
+        limit (int): Return only the latest this many messages (all when None).
+        before (str): Cursor from resume_chat_page; only messages older than it, to page further back.
+    """
+    messages = _find_messages(chat_name, limit, before)
+    for message in messages:
+        del message["_id"]
+    return messages
+
+def _find_messages(chat_name, limit=None, before=None):
+    # Messages oldest first, with their _id for page cursors
+    if chat_archive.is_archived(chat_name):
+        chat_archive.rehydrate(chat_name)
+    query = {"chat_name": chat_name, **older_than(before)}
+    if limit is None:
+        return list(message_collection.find(query, MESSAGE_FIELDS).sort(OLDEST_FIRST))
+    latest = list(message_collection.find(query, MESSAGE_FIELDS).sort(NEWEST_FIRST).limit(limit))
+    return latest[::-1]
+
+def resume_chat_page(chat_name, limit=Config.CHAT_PAGE_SIZE, before=None):
+    """
+    One page of a session's history for the chat view: the latest messages first, then older pages on scroll.
+
+    Returns:
+        dict: "messages" oldest first, and "before", the opaque cursor string for the previous page
+        (None when there is none).
+    """
+    return history_page(_find_messages(chat_name, limit=limit + 1, before=before), limit)
+
+def migrate_embedded_messages():
+    """
+    Move messages from the old embedded "messages" arrays of chat_history into chat_messages.
+    Safe to re-run: each message gets a deterministic _id, so an interrupted migration does not duplicate turns.
+    Turns without a timestamp get the one before them (or the session's creation time), so history paging sees them.
+
+    Returns:
+        int: Number of sessions migrated.
+    """
+    migrated = 0
+    for session in chat_collection.find({"messages.0": {"$exists": True}}, {"chat_name": 1, "messages": 1}):
+        # Leading turns without one take the first known timestamp; ties keep their order through the _id
+        known = [m.get("timestamp") for m in session["messages"] if m.get("timestamp")]
+        timestamp = known[0] if known else _session_created(session)
+        documents = []
+        for i, message in enumerate(session["messages"]):
+            timestamp = message.get("timestamp") or timestamp
+            documents.append({
+                "_id": f"{session['_id']}:{i:06d}",
+                "chat_name": session["chat_name"],
+                "human": message.get("human"),
+                "AI": message.get("AI"),
+                "timestamp": timestamp
+            })
+        try:
+            message_collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate keys are messages copied by an earlier, interrupted run
+            if not only_duplicate_keys(e):
+                raise
+        chat_collection.update_one({"_id": session["_id"]}, {"$unset": {"messages": ""}})
+        migrated += 1
+    print(f"Migrated {migrated} chat sessions to the chat_messages collection")
+    _backfill_timestamps()
+    return migrated
+
+def _session_created(session):
+    if isinstance(session["_id"], ObjectId):
+        return session["_id"].generation_time.replace(tzinfo=None)
+    return session.get("timestamp") or datetime.utcnow()
+
+def _backfill_timestamps():
+    # Turns copied by earlier runs of the migration may still lack a timestamp; $lt never matches null
+    for chat_name in message_collection.distinct("chat_name", {"timestamp": None}):
+        session = chat_collection.find_one({"chat_name": chat_name}, {"timestamp": 1})
+        created = _session_created(session) if session else datetime.utcnow()
+        result = message_collection.update_many({"chat_name": chat_name, "timestamp": None}, {"$set": {"timestamp": created}})
+        print(f"Backfilled the timestamp of {result.modified_count} turns of chat {chat_name!r}")
+
+def fetch_all_chat_names(limit=None):
+    """Chat names, most recently active first (the newest limit of them when limit is given)."""
+    cursor = chat_collection.find({}, {"chat_name": 1, "_id": 0}).sort("timestamp", DESCENDING)
+    if limit:
+        cursor = cursor.limit(limit)
+    chat_names = [chat["chat_name"] for chat in cursor]
     
     return chat_names
 
-def main(chat_name,user_message):
+def list_chats(limit=Config.CHAT_PAGE_SIZE, before=None):
+    """
+    One page of the chat sidebar, most recently active first, read through the timestamp index.
+
+    Parameters:
+        limit (int): Chats per page.
+        before (str): Cursor from the previous page; only chats after it in recency order.
+
+    Returns:
+        dict: "chats" ({chat_name, video_id, timestamp, ended}) and "before", the opaque cursor string
+        for the next page (None on the last page).
+    """
+    chats = list(chat_collection.find(older_than(before), CHAT_LIST_FIELDS).sort(NEWEST_FIRST).limit(limit + 1))
+    return chat_list_page(chats, limit)
+
+def get_chat_video_id(chat_name):
+    """Return the video a chat session is about, if it was created with one."""
+    session_data = chat_collection.find_one({"chat_name": chat_name}, {"video_id": 1, "_id": 0})
+    return session_data.get("video_id") if session_data else None
+
+def load_memory(chat_name):
+    """Conversation memory for the prompt: summary of older turns plus every turn not yet summarized."""
+    if chat_archive.is_archived(chat_name):
+        chat_archive.rehydrate(chat_name)
+    return format_history(*chat_memory.load(chat_name))
+
+def refresh_summary(chat_name):
+    """Fold turns that left the memory window into the session summary, if enough are waiting."""
+    try:
+        chat_memory.update(chat_name)
+    except Exception as e:
+        # The previous summary stays valid; the next turn retries
+        print(f"Could not update the summary of chat {chat_name!r}: {e}")
+
+def main(chat_name,user_message,video_id=None):
     # create_or_get_chat(chat_name)
     # if end_session == True:
     #     end_chat_session(chat_name)
     #     print("Chat session ended.")
     
-    ai_response = conversation(user_message)
+    if video_id is None:
+        video_id = get_chat_video_id(chat_name)
+    ai_response = conversation(user_message, video_id, load_memory(chat_name))
     store_chat_in_mongo(chat_name, user_message, ai_response)
+    _summary_executor.submit(refresh_summary, chat_name)
+    return ai_response
+
+async def main_async(chat_name, user_message, video_id=None, store=None):
+    """
+    Async variant of main() for async request handlers: the turn is queued on the write-behind
+    writer of model.chat_store, so the answer is returned without waiting for MongoDB.
+
+    Parameters:
+        store (AsyncChatStore): Store to use; the process-wide one by default.
+    """
+    store = store or get_chat_store()
+    if video_id is None:
+        video_id = await store.get_chat_video_id(chat_name)
+    history = format_history(*await store.load_memory(chat_name, chat_memory.max_turns))
+    # The LLM call is blocking; keep it off the event loop
+    ai_response = await asyncio.to_thread(conversation, user_message, video_id, history)
+    await store.record_turn(chat_name, user_message, ai_response)
+    # A turn still queued for writing is simply folded into the summary on a later turn
+    _summary_executor.submit(refresh_summary, chat_name)
     return ai_response
\ No newline at end of file
@@ -0,0 +1,141 @@
+import os
+import re
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class Config:
+    """Paths and tunables shared by the transcript, RAG and chat modules."""
+
+    # Data locations (override with EDU_PRO_DATA_DIR outside the dev box)
+    DATA_DIR = os.getenv("EDU_PRO_DATA_DIR", r"A:\Projects\Edu_Pro\backend\data")
+    SINGLE_TRANSCRIPT_PATH = os.path.join(DATA_DIR, "single.json")
+    INDEX_DIR = os.path.join(DATA_DIR, "index")
+    TRANSCRIPTS_DIR = os.path.join(DATA_DIR, "transcripts")
+    # Append-only SQLite store of bulk-ingested caption segments (replaces multi.json)
+    TRANSCRIPT_DB_PATH = os.path.join(DATA_DIR, "transcripts.sqlite3")
+
+    # Cache of fetched captions and ASR output per (video, source, model, language):
+    # entries expire after TRANSCRIPT_CACHE_TTL_DAYS (0 never) and the oldest-read are evicted past TRANSCRIPT_CACHE_MB
+    TRANSCRIPT_CACHE_DIR = os.path.join(DATA_DIR, "transcript_cache")
+    TRANSCRIPT_CACHE_TTL = float(os.getenv("TRANSCRIPT_CACHE_TTL_DAYS", "30")) * 24 * 3600
+    TRANSCRIPT_CACHE_MB = int(os.getenv("TRANSCRIPT_CACHE_MB", "2048"))
+    # Caption language requested from YouTube
+    CAPTION_LANGUAGE = os.getenv("CAPTION_LANGUAGE", "en")
+    # Caption compaction before indexing: merge rolling auto-caption lines, drop repeated n-grams
+    # (up to CAPTION_DEDUP_MAX_NGRAM words) and re-chunk to about CAPTION_CHUNK_TOKENS tokens
+    CAPTION_COMPACTION = os.getenv("CAPTION_COMPACTION", "1") == "1"
+    CAPTION_DEDUP_MAX_NGRAM = int(os.getenv("CAPTION_DEDUP_MAX_NGRAM", "4"))
+    CAPTION_CHUNK_TOKENS = int(os.getenv("CAPTION_CHUNK_TOKENS", "128"))
+    # Bulk caption ingestion: concurrent fetches sharing one rate limit, with jittered backoff when throttled.
+    # CAPTION_SERVER_URL points ingestion at a caption mirror or a local stub server instead of YouTube.
+    CAPTION_FETCH_WORKERS = int(os.getenv("CAPTION_FETCH_WORKERS", "4"))
+    CAPTION_RATE_PER_SEC = float(os.getenv("CAPTION_RATE_PER_SEC", "2"))
+    CAPTION_BURST = float(os.getenv("CAPTION_BURST", "4"))
+    CAPTION_MAX_RETRIES = int(os.getenv("CAPTION_MAX_RETRIES", "5"))
+    CAPTION_BACKOFF_SECONDS = float(os.getenv("CAPTION_BACKOFF_SECONDS", "2"))
+    CAPTION_SERVER_URL = os.getenv("CAPTION_SERVER_URL", "")
+
+    # Embedding model used by the RAG system
+    EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+    # RAG index type: flat, ivf_flat, ivf_pq or hnsw. Approximate types fall back
+    # to flat while a transcript is too small to train them.
+    INDEX_TYPE = os.getenv("RAG_INDEX_TYPE", "flat")
+    IVF_NLIST = int(os.getenv("RAG_IVF_NLIST", "0"))  # 0 picks ~4*sqrt(n) lists; always capped at n/39
+    IVF_NPROBE = int(os.getenv("RAG_IVF_NPROBE", "16"))
+    PQ_M = int(os.getenv("RAG_PQ_M", "16"))  # sub-quantizers, must divide the embedding dimension
+    PQ_NBITS = 8
+    HNSW_M = int(os.getenv("RAG_HNSW_M", "32"))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("RAG_HNSW_EF_CONSTRUCTION", "80"))
+    HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "64"))
+    # Vector storage inside the index: float32, float16, sq8 or pq. Compressed modes keep
+    # the float32 embeddings only on disk (memory-mapped) for rebuilds.
+    EMBEDDING_STORAGE = os.getenv("RAG_EMBEDDING_STORAGE", "float32")
+
+    # Number of transcript chunks passed to the chat prompt
+    RAG_TOP_K = int(os.getenv("RAG_TOP_K", "3"))
+
+    # Hybrid retrieval: fuse BM25 and vector rankings (reciprocal rank fusion)
+    HYBRID_SEARCH = os.getenv("RAG_HYBRID_SEARCH", "1") == "1"
+    HYBRID_CANDIDATES = int(os.getenv("RAG_HYBRID_CANDIDATES", "20"))  # depth of each ranking before fusion
+    RRF_K = 60
+
+    # Loaded per-video RAG systems kept in memory (LRU, bounded by count and estimated size)
+    RAG_CACHE_MAX_INDEXES = int(os.getenv("RAG_CACHE_MAX_INDEXES", "64"))
+    RAG_CACHE_MB = int(os.getenv("RAG_CACHE_MB", "1024"))
+
+    # Query micro-batching: wait up to this long (0 disables) or until this many queries are queued
+    QUERY_BATCH_WAIT_MS = float(os.getenv("RAG_QUERY_BATCH_WAIT_MS", "5"))
+    QUERY_BATCH_SIZE = int(os.getenv("RAG_QUERY_BATCH_SIZE", "32"))
+
+    # LRU cache sizes for query embeddings and top-k retrieval results (0 disables)
+    EMBEDDING_CACHE_SIZE = int(os.getenv("RAG_EMBEDDING_CACHE_SIZE", "2048"))
+    RESULT_CACHE_SIZE = int(os.getenv("RAG_RESULT_CACHE_SIZE", "2048"))
+
+    # Whisper model size (tiny, base, small, medium, large)
+    WHISPER_MODEL = "base"
+    # Speech recognition backend: whisper (openai-whisper, fp32 on CPU), faster_whisper (CTranslate2,
+    # ASR_COMPUTE_TYPE weights: int8, int8_float32, float16, float32) or google (Web Speech API)
+    ASR_BACKEND = os.getenv("ASR_BACKEND", "whisper")
+    ASR_COMPUTE_TYPE = os.getenv("ASR_COMPUTE_TYPE", "int8")
+    ASR_DEVICE = os.getenv("ASR_DEVICE", "cpu")
+    ASR_BEAM_SIZE = int(os.getenv("ASR_BEAM_SIZE", "5"))
+    # Approximate memory of faster-whisper int8 models (MB), for the model registry budget
+    FASTER_WHISPER_MB = {"tiny": 100, "base": 200, "small": 500, "medium": 1200, "large": 2500}
+    # Longest piece of audio sent to the Google recognizer in one request
+    GOOGLE_CHUNK_SECONDS = 50
+    # Legacy speech_recognition path (try.py): overlapping windows recognized by up to SR_MAX_CONCURRENCY threads
+    SR_WINDOW_SECONDS = int(os.getenv("SR_WINDOW_SECONDS", "30"))
+    SR_OVERLAP_SECONDS = int(os.getenv("SR_OVERLAP_SECONDS", "2"))
+    SR_MAX_CONCURRENCY = int(os.getenv("SR_MAX_CONCURRENCY", "4"))
+    # Streaming ingestion: seconds of audio per ASR call (cut at the next pause), and minute chunks per encoder batch
+    STREAM_WINDOW_SECONDS = int(os.getenv("STREAM_WINDOW_SECONDS", "120"))
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "8"))
+    # Transcription worker processes: "0" transcribes in the calling process, "auto" sizes the pool
+    # from cores and free memory, or give an explicit count
+    TRANSCRIPTION_WORKERS = os.getenv("TRANSCRIPTION_WORKERS", "0")
+    # Background transcription jobs: state persisted here, and how many run at once
+    JOB_DB_PATH = os.path.join(DATA_DIR, "jobs.sqlite3")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+    # Model registry: unload models idle for this many seconds (0 disables),
+    # and keep the loaded set under this many MB (0 means no budget)
+    MODEL_IDLE_TIMEOUT = int(os.getenv("MODEL_IDLE_TIMEOUT", "900"))
+    MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+    # Comma-separated registry keys to load at startup, e.g. "encoder,whisper"
+    WARMUP_MODELS = [m.strip() for m in os.getenv("WARMUP_MODELS", "").split(",") if m.strip()]
+
+    # Chat history in MongoDB, and how many messages one page of a resumed chat holds
+    MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+    MONGO_DB = os.getenv("MONGO_DB", "chatbot_db")
+    CHAT_PAGE_SIZE = int(os.getenv("CHAT_PAGE_SIZE", "50"))
+    # Conversation memory sent to the LLM: a summary of older turns plus every turn not yet in it verbatim (each
+    # message clipped to CHAT_MEMORY_TURN_CHARS). Turns older than the last CHAT_MEMORY_TURNS are folded into the
+    # summary once CHAT_SUMMARY_EVERY of them are waiting, so at most CHAT_MEMORY_TURNS + CHAT_SUMMARY_EVERY - 1 are sent
+    CHAT_MEMORY_TURNS = int(os.getenv("CHAT_MEMORY_TURNS", "6"))
+    CHAT_MEMORY_TURN_CHARS = int(os.getenv("CHAT_MEMORY_TURN_CHARS", "1500"))
+    CHAT_SUMMARY_EVERY = int(os.getenv("CHAT_SUMMARY_EVERY", "4"))
+    CHAT_SUMMARY_MAX_WORDS = int(os.getenv("CHAT_SUMMARY_MAX_WORDS", "200"))
+    # Async access (model.chat_store): connection pool bounds, idle timeout and server selection timeout
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+    MONGO_MAX_IDLE_MS = int(os.getenv("MONGO_MAX_IDLE_MS", "60000"))
+    MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "5000"))
+    # Write-behind of chat turns: queued turns before requests wait, turns per insert_many, and the longest
+    # a queued turn waits for its batch to fill
+    CHAT_WRITE_QUEUE_SIZE = int(os.getenv("CHAT_WRITE_QUEUE_SIZE", "1000"))
+    CHAT_WRITE_BATCH_SIZE = int(os.getenv("CHAT_WRITE_BATCH_SIZE", "100"))
+    CHAT_WRITE_FLUSH_MS = float(os.getenv("CHAT_WRITE_FLUSH_MS", "50"))
+    # Cold storage of ended chats: archived (zstd, CHAT_ARCHIVE_LEVEL) once idle for CHAT_ARCHIVE_AFTER_DAYS,
+    # then deleted after CHAT_ARCHIVE_TTL_DAYS (0 keeps them)
+    CHAT_ARCHIVE_AFTER_DAYS = float(os.getenv("CHAT_ARCHIVE_AFTER_DAYS", "7"))
+    CHAT_ARCHIVE_TTL_DAYS = float(os.getenv("CHAT_ARCHIVE_TTL_DAYS", "365"))
+    CHAT_ARCHIVE_LEVEL = int(os.getenv("CHAT_ARCHIVE_LEVEL", "10"))
+
+    @classmethod
+    def transcript_path(cls, video_id):
+        """Return the per-video transcript JSON path, rejecting ids that are not plain YouTube-style ids."""
+        if not video_id or not re.fullmatch(r"[A-Za-z0-9_-]+", video_id):
+            raise ValueError(f"Invalid video ID: {video_id!r}")
+        return os.path.join(cls.TRANSCRIPTS_DIR, f"{video_id}.json")
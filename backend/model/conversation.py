@@ -3,13 +3,45 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 import os
 import json
 from dotenv import load_dotenv
+from model.config import Config
 from model.rag import rag_main
 
 load_dotenv()
 
-def conversation(user_message):
-    transcript_file = r"A:\Projects\Edu_Pro\backend\data\single.json"
-    content = rag_main(user_message)
+def get_llm():
+    return ChatGoogleGenerativeAI(model="models/gemini-1.5-pro-001", google_api_key=os.getenv("GEMINI_API_KEY"))
+
+def summarize_history(summary, turns):
+    """
+    Fold older chat turns into the running summary of a conversation (used by model.chat_memory).
+
+    Parameters:
+        summary (str): Summary so far ("" for none).
+        turns (list): {"human", "AI"} turns to add, oldest first.
+    """
+    transcript = "\n".join(f"User: {t.get('human', '')}\nAssistant: {t.get('AI', '')}" for t in turns)
+    prompt = f"""
+        Update the summary of a tutoring conversation about a Mathematics video.
+        Keep the topics, the problems worked on, key results and anything the user said they did not understand.
+        Reply with the summary only, in at most {Config.CHAT_SUMMARY_MAX_WORDS} words.
+
+        Current summary:
+        {summary or "(none)"}
+
+        New messages:
+        {transcript}
+        """
+    return get_llm().predict(prompt).strip()
+
+def conversation(user_message, video_id=None, history=""):
+    """
+    Answer a chat message from the video's transcript.
+
+    Parameters:
+        history (str): Conversation memory from model.chat_memory.format_history ("" for a new chat).
+    """
+    content = rag_main(user_message, video_id)
+    history_block = f"Conversation so far:\n{history}" if history else ""
     print("The rag provided content is",content)
     if user_message.lower() in ["hi", "hii", "hello", "hey"]:
         print("If working")
@@ -32,10 +64,11 @@ def conversation(user_message):
 
         Relevant content:
         {content}
+        {history_block}
 
         Provide a concise and helpful response.
         """
     print("The prompt is",prompt)
-    llm = ChatGoogleGenerativeAI(model="models/gemini-1.5-pro-001", google_api_key=os.getenv("GEMINI_API_KEY"))
+    llm = get_llm()
     ai_response = llm.predict(prompt)
     return ai_response
\ No newline at end of file
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+import faiss
+from typing import Dict, Any, Optional, Tuple
+
+# (path) -> (mtime_ns, size, sha256) so unchanged files are not re-hashed per query
+_hash_cache: Dict[str, Tuple[int, int, str]] = {}
+_hash_lock = threading.Lock()
+
+def file_content_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Return the SHA-256 of a file, reusing the previous digest while its mtime and size are unchanged.
+
+    Args:
+        path: Path of the file to hash.
+        chunk_size: Number of bytes read per iteration.
+
+    Returns:
+        Hex digest of the file contents.
+    """
+    stat = os.stat(path)
+    with _hash_lock:
+        cached = _hash_cache.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    content_hash = digest.hexdigest()
+
+    with _hash_lock:
+        _hash_cache[path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+    return content_hash
+
+def chunk_id(content: str, occurrence: int = 0) -> int:
+    """
+    Derive a stable FAISS id from a chunk's text.
+
+    Args:
+        content: The chunk text.
+        occurrence: How many identical chunks precede this one, so repeated lines get distinct ids.
+
+    Returns:
+        A non-negative 63-bit integer id.
+    """
+    digest = hashlib.sha256(f"{occurrence}\0{content}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') & 0x7FFFFFFFFFFFFFFF
+
+def store_key(json_path: str) -> str:
+    """Return the store directory name for a transcript file."""
+    return hashlib.sha256(os.path.abspath(json_path).encode('utf-8')).hexdigest()[:16]
+
+def _atomic_write(path: str, write_fn) -> None:
+    """Write through a temporary file and rename it into place so readers never see a partial file."""
+    # Unique per writer, so two processes saving the same store never write into each other's temp file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write_fn(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class IndexStore:
+    """On-disk FAISS index, embedding matrix and chunk ids for one transcript."""
+
+    INDEX_FILE = "index.faiss"
+    EMBEDDINGS_FILE = "embeddings.npy"
+    IDS_FILE = "ids.npy"
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, root_dir: str, key: str):
+        """
+        Args:
+            root_dir: Directory holding one sub-directory per stored index.
+            key: Name of this store's sub-directory (see store_key).
+        """
+        self.path = os.path.join(root_dir, key)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.path, self.INDEX_FILE)
+
+    @property
+    def embeddings_path(self) -> str:
+        return os.path.join(self.path, self.EMBEDDINGS_FILE)
+
+    @property
+    def ids_path(self) -> str:
+        return os.path.join(self.path, self.IDS_FILE)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.path, self.MANIFEST_FILE)
+
+    def exists(self) -> bool:
+        """Check whether an index has been saved in this store."""
+        return all(os.path.exists(p) for p in (self.index_path, self.embeddings_path, self.ids_path, self.manifest_path))
+
+    def save(self, index: faiss.Index, embeddings: np.ndarray, ids: np.ndarray, manifest: Dict[str, Any]) -> None:
+        """
+        Persist the index together with its embeddings and chunk ids.
+
+        Args:
+            index: The FAISS index to serialize.
+            embeddings: Normalized float32 embeddings, one row per id.
+            ids: int64 chunk ids in the same order as the embedding rows.
+            manifest: Metadata such as the transcript version and encoder name.
+        """
+        os.makedirs(self.path, exist_ok=True)
+
+        def write_array(array, dtype):
+            def write(tmp_path):
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, np.ascontiguousarray(array, dtype=dtype))
+            return write
+
+        def write_manifest(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+
+        # The manifest is written last; load() cross-checks the row counts in case a save was interrupted
+        _atomic_write(self.embeddings_path, write_array(embeddings, 'float32'))
+        _atomic_write(self.ids_path, write_array(ids, 'int64'))
+        _atomic_write(self.index_path, lambda tmp_path: faiss.write_index(index, tmp_path))
+        _atomic_write(self.manifest_path, write_manifest)
+
+    def load_embeddings(self) -> Optional[np.ndarray]:
+        """Return the stored embeddings memory-mapped, so they cost page cache rather than heap."""
+        try:
+            return np.load(self.embeddings_path, mmap_mode='r')
+        except Exception as e:
+            print(f"Error loading stored embeddings from {self.path}: {e}")
+            return None
+
+    def load(self) -> Optional[Tuple[faiss.Index, np.ndarray, np.ndarray, Dict[str, Any]]]:
+        """
+        Load a previously saved index.
+
+        Returns:
+            Tuple of (index, memory-mapped embeddings, ids, manifest), or None if nothing usable is stored.
+        """
+        if not self.exists():
+            return None
+        try:
+            index = faiss.read_index(self.index_path)
+            embeddings = np.load(self.embeddings_path, mmap_mode='r')
+            ids = np.load(self.ids_path)
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"Error loading stored index from {self.path}: {e}")
+            return None
+
+        if not (index.ntotal == len(ids) == embeddings.shape[0]):
+            print(f"Stored index at {self.path} is inconsistent, ignoring it")
+            return None
+        return index, embeddings, ids, manifest
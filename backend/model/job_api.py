@@ -0,0 +1,54 @@
+"""
+HTTP API for background transcription jobs. Mount it on the chat server with
+    app.include_router(job_router, prefix="/jobs", tags=["jobs"])
+
+    POST /jobs                  {"url": ..., "kind": "whisper" | "captions"} -> job (202)
+    GET  /jobs/{job_id}         current state, for polling
+    GET  /jobs/{job_id}/events  Server-Sent Events: one "progress" event per change, then "done" or "failed"
+"""
+import json
+import time
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import iterate_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from model.jobs import get_job_manager
+
+job_router = APIRouter()
+
+class JobRequest(BaseModel):
+    url: str
+    kind: str = "whisper"
+
+# The handlers read the SQLite job store, which blocks, so they are plain functions: FastAPI runs them in its
+# threadpool instead of on the event loop
+@job_router.post('', status_code=202)
+def submit_job(request: JobRequest):
+    try:
+        return get_job_manager().submit(request.url, request.kind)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@job_router.get('/{job_id}')
+def job_status(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+def _sse_stream(job_id):
+    for job in get_job_manager().events(job_id):
+        if job is None:
+            # Comment line: keeps proxies from closing an idle stream
+            yield f": keep-alive {int(time.time())}\n\n"
+            continue
+        event = job["status"] if job["status"] in ("done", "failed") else "progress"
+        yield f"event: {event}\ndata: {json.dumps(job)}\n\n"
+
+@job_router.get('/{job_id}/events')
+def job_events(job_id: str):
+    if get_job_manager().get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    # events() blocks between updates, so iterate it off the event loop
+    return StreamingResponse(iterate_in_threadpool(_sse_stream(job_id)), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,223 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from model.config import Config
+
+# Job lifecycle; "queued" and "running" jobs are picked up again after a restart
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+class JobStore:
+    """SQLite table of transcription jobs, so job state outlives the server process."""
+
+    def __init__(self, db_path: str = Config.JOB_DB_PATH):
+        """
+        Args:
+            db_path: Path of the SQLite database file; created on first use.
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections must not be shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def create(self, kind: str, url: str) -> Dict[str, Any]:
+        now = time.time()
+        job = {"job_id": uuid.uuid4().hex, "kind": kind, "url": url, "status": QUEUED, "stage": None,
+               "progress": None, "result": None, "error": None, "created_at": now, "updated_at": now}
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT INTO jobs VALUES (:job_id, :kind, :url, :status, :stage, :progress, :result, :error, "
+                         ":created_at, :updated_at)", job)
+        return job
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Set the given columns of a job and bump its updated_at."""
+        fields["updated_at"] = time.time()
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"])
+        assignments = ", ".join(f"{column} = :{column}" for column in fields)
+        conn = self._connection()
+        with conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = :job_id", dict(fields, job_id=job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Jobs that were queued or running, oldest first."""
+        rows = self._connection().execute("SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                                          (QUEUED, RUNNING)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+def _run_whisper(url: str, progress: Callable) -> Dict[str, Any]:
+    from model.video_to_transcribe import main_video
+    return {"video_id": main_video(url, progress=progress)}
+
+def _run_captions(url: str, progress: Callable) -> Dict[str, Any]:
+    from model.youtube_transcriber import extract_video_id, get_transcript_one
+    progress("downloading")
+    if get_transcript_one(url) is None:
+        raise RuntimeError("No captions could be fetched for this video")
+    return {"video_id": extract_video_id(url)}
+
+# Job kinds: "whisper" transcribes the audio, "captions" fetches YouTube's captions
+JOB_RUNNERS = {"whisper": _run_whisper, "captions": _run_captions}
+
+class JobManager:
+    """
+    Runs transcription jobs in background threads so requests return a job ID immediately.
+    Progress is written to the JobStore and broadcast to event subscribers (e.g. an SSE stream).
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, workers: int = Config.JOB_WORKERS,
+                 runners: Optional[Dict[str, Callable]] = None):
+        """
+        Args:
+            store: Where job state is persisted; defaults to the one at Config.JOB_DB_PATH.
+            workers: Jobs run at the same time; more are queued.
+            runners: Map of job kind to runner(url, progress) -> result dict; defaults to JOB_RUNNERS.
+        """
+        self.store = store or JobStore()
+        self.runners = runners or JOB_RUNNERS
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcription-job")
+        self._changed = threading.Condition()
+        self._version = 0
+
+    def submit(self, url: str, kind: str = "whisper") -> Dict[str, Any]:
+        """
+        Queue a job and return its initial state (including 'job_id') without waiting for it.
+
+        Raises:
+            ValueError: If kind is not a known job kind.
+        """
+        if kind not in self.runners:
+            raise ValueError(f"Unknown job kind {kind!r}; expected one of {', '.join(self.runners)}")
+        job = self.store.create(kind, url)
+        self._executor.submit(self._run, job["job_id"], kind, url)
+        return job
+
+    def resume(self) -> int:
+        """
+        Re-queue jobs that were queued or running when the previous process stopped.
+        Finished work is not lost: the transcript cache makes a re-run of a completed transcription cheap.
+
+        Returns:
+            Number of jobs re-queued.
+        """
+        jobs = self.store.unfinished()
+        for job in jobs:
+            self.store.update(job["job_id"], status=QUEUED, stage=None, progress=None)
+            self._executor.submit(self._run, job["job_id"], job["kind"], job["url"])
+        if jobs:
+            print(f"Resumed {len(jobs)} unfinished transcription jobs")
+        return len(jobs)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def events(self, job_id: str, heartbeat: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the job's state each time it changes, until it is done or failed.
+        None is yielded after heartbeat seconds without a change, so streams can send keep-alives.
+        """
+        last = None
+        while True:
+            with self._changed:
+                version = self._version
+            job = self.store.get(job_id)
+            if job is None:
+                return
+            if last is None or job["updated_at"] != last["updated_at"]:
+                yield job
+                last = job
+            if job["status"] in FINISHED:
+                return
+            with self._changed:
+                if not self._changed.wait_for(lambda: self._version != version, timeout=heartbeat):
+                    yield None
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop taking jobs. Jobs still queued or running stay in the store and resume() picks them up."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        self.store.update(job_id, **fields)
+        with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+
+    def _run(self, job_id: str, kind: str, url: str) -> None:
+        last_reported = {"stage": None, "percent": None}
+
+        def progress(stage: str, percent: Optional[float] = None) -> None:
+            # Persist stage changes and whole-percent steps only, not every segment
+            rounded = None if percent is None else int(percent)
+            if stage == last_reported["stage"] and rounded == last_reported["percent"]:
+                return
+            last_reported.update(stage=stage, percent=rounded)
+            self._update(job_id, stage=stage, progress=percent)
+
+        self._update(job_id, status=RUNNING)
+        try:
+            result = self.runners[kind](url, progress)
+        except Exception as e:
+            print(f"❌ Transcription job {job_id} failed: {e}")
+            self._update(job_id, status=FAILED, error=str(e))
+            return
+        self._update(job_id, status=DONE, stage=None, progress=100.0, result=result)
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager() -> JobManager:
+    """Return the process-wide job manager, resuming jobs left unfinished by the previous run on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+            _manager.resume()
+        return _manager
@@ -0,0 +1,194 @@
+import gc
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+from model.config import Config
+
+class _Entry:
+    """Bookkeeping for one registered model."""
+
+    def __init__(self, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]], size_mb: Optional[float]):
+        self.loader = loader
+        self.warmup = warmup
+        self.size_mb = size_mb
+        self.model = None
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+
+def _estimate_size_mb(model: Any) -> float:
+    """Estimate the weight size of a torch-backed model from its parameters."""
+    try:
+        total = sum(p.numel() * p.element_size() for p in model.parameters())
+        return total / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+class ModelRegistry:
+    """Process-wide cache of heavy models: loaded once on first use, unloaded when idle or over budget."""
+
+    def __init__(self, idle_timeout: int = Config.MODEL_IDLE_TIMEOUT, memory_budget_mb: int = Config.MODEL_MEMORY_BUDGET_MB):
+        """
+        Args:
+            idle_timeout: Seconds a model may stay unused before it is unloaded (0 disables).
+            memory_budget_mb: Upper bound on the estimated size of loaded models (0 means no budget).
+        """
+        self.idle_timeout = idle_timeout
+        self.memory_budget_mb = memory_budget_mb
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def register(self, key: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None,
+                 size_mb: Optional[float] = None) -> None:
+        """
+        Register a model under a key without loading it.
+
+        Args:
+            key: Registry key, e.g. "encoder:all-MiniLM-L6-v2".
+            loader: Zero-argument callable that loads and returns the model.
+            warmup: Optional callable run once on the freshly loaded model.
+            size_mb: Size hint used for the memory budget; estimated from the weights if omitted.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = _Entry(loader, warmup, size_mb)
+
+    def get(self, key: str) -> Any:
+        """
+        Return the model registered under key, loading it on first use.
+
+        Raises:
+            KeyError: If no model is registered under key.
+        """
+        with self._lock:
+            entry = self._entries[key]
+        with entry.lock:
+            if entry.model is None:
+                print(f"Loading model {key}...")
+                start = time.perf_counter()
+                entry.model = entry.loader()
+                if entry.size_mb is None:
+                    entry.size_mb = _estimate_size_mb(entry.model)
+                if entry.warmup:
+                    entry.warmup(entry.model)
+                print(f"Model {key} ready in {time.perf_counter() - start:.2f}s")
+            entry.last_used = time.monotonic()
+            model = entry.model
+        self._ensure_reaper()
+        self.enforce_budget(keep=key)
+        return model
+
+    def warmup(self, keys: Iterable[str]) -> None:
+        """Load (and warm) the given models ahead of the first request."""
+        for key in keys:
+            try:
+                self.get(key)
+            except Exception as e:
+                print(f"Error warming model {key}: {e}")
+
+    def unload(self, key: str) -> None:
+        """Drop the registry's reference to a model so its memory can be reclaimed."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry:
+            return
+        with entry.lock:
+            if entry.model is None:
+                return
+            entry.model = None
+        gc.collect()
+        print(f"Unloaded model {key}")
+
+    def loaded(self) -> Dict[str, float]:
+        """Return the estimated size in MB of every currently loaded model."""
+        with self._lock:
+            return {key: entry.size_mb or 0.0 for key, entry in self._entries.items() if entry.model is not None}
+
+    def evict_idle(self) -> None:
+        """Unload every model that has been unused for longer than the idle timeout."""
+        if self.idle_timeout <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, entry in self._entries.items()
+                    if entry.model is not None and now - entry.last_used > self.idle_timeout]
+        for key in idle:
+            self.unload(key)
+
+    def enforce_budget(self, keep: Optional[str] = None) -> None:
+        """Unload least recently used models until the loaded set fits the memory budget."""
+        if self.memory_budget_mb <= 0:
+            return
+        with self._lock:
+            loaded = sorted(((entry.last_used, key, entry.size_mb or 0.0)
+                             for key, entry in self._entries.items() if entry.model is not None))
+        total = sum(size for _, _, size in loaded)
+        for _, key, size in loaded:
+            if total <= self.memory_budget_mb:
+                break
+            if key == keep:
+                continue
+            self.unload(key)
+            total -= size
+
+    def _ensure_reaper(self) -> None:
+        """Start the background thread that evicts idle models."""
+        if self.idle_timeout <= 0 or self._reaper is not None:
+            return
+        with self._lock:
+            if self._reaper is not None:
+                return
+            interval = max(1, min(60, self.idle_timeout // 4))
+
+            def reap():
+                while True:
+                    time.sleep(interval)
+                    self.evict_idle()
+
+            self._reaper = threading.Thread(target=reap, name="model-registry-reaper", daemon=True)
+            self._reaper.start()
+
+registry = ModelRegistry()
+
+def _load_encoder(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+def _load_whisper(model_size: str):
+    import whisper
+    return whisper.load_model(model_size)
+
+def _warm_whisper(model) -> None:
+    import numpy as np
+    # One second of silence at Whisper's 16 kHz input rate
+    model.transcribe(np.zeros(16000, dtype=np.float32), fp16=False)
+
+def get_encoder(model_name: str = Config.EMBEDDING_MODEL):
+    """Return the shared SentenceTransformer for model_name."""
+    key = f"encoder:{model_name}"
+    registry.register(key, lambda: _load_encoder(model_name), warmup=lambda m: m.encode(["warmup"]))
+    return registry.get(key)
+
+def get_whisper(model_size: str = Config.WHISPER_MODEL):
+    """Return the shared Whisper model of the given size."""
+    key = f"whisper:{model_size}"
+    registry.register(key, lambda: _load_whisper(model_size), warmup=_warm_whisper)
+    return registry.get(key)
+
+def warmup_models(names: Iterable[str] = Config.WARMUP_MODELS) -> None:
+    """
+    Load models at startup so the first request does not pay for it.
+
+    Args:
+        names: "encoder" and/or "whisper" for the configured defaults.
+    """
+    loaders = {"encoder": get_encoder, "whisper": get_whisper}
+    for name in names:
+        loader = loaders.get(name)
+        if not loader:
+            print(f"Unknown model to warm up: {name}")
+            continue
+        try:
+            loader()
+        except Exception as e:
+            print(f"Error warming model {name}: {e}")
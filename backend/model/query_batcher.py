@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Dict, Any
+import numpy as np
+from model.config import Config
+
+class _Request:
+    """One pending search waiting to be batched."""
+
+    def __init__(self, rag, query: str, top_k: int):
+        self.rag = rag
+        self.query = query
+        self.top_k = top_k
+        self.future = Future()
+
+class QueryBatcher:
+    """Collects concurrent RAG queries over a short window and serves them with batched encode and search calls."""
+
+    def __init__(self, max_batch_size: int = Config.QUERY_BATCH_SIZE, max_wait_ms: float = Config.QUERY_BATCH_WAIT_MS):
+        """
+        Args:
+            max_batch_size: Dispatch as soon as this many queries are waiting.
+            max_wait_ms: Longest time the first query of a batch waits for company (0 disables batching).
+        """
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, rag, query: str, top_k: int = 5) -> Future:
+        """
+        Queue a query against a RAGSystem.
+
+        Returns:
+            A Future resolving to the list of documents with similarity scores.
+        """
+        request = _Request(rag, query, top_k)
+        self._ensure_worker()
+        self._queue.put(request)
+        return request.future
+
+    def search(self, rag, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Blocking equivalent of rag.search(query, top_k) that shares encoder passes with concurrent callers."""
+        if self.max_wait == 0:
+            return rag.search(query, top_k)
+        return self.submit(rag, query, top_k).result()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="rag-query-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> List[_Request]:
+        """Block for the first request, then gather more until the batch is full or the window closes."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                self._process(batch)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _process(self, batch: List[_Request]) -> None:
+        # One encoder pass per embedding model
+        by_model: Dict[str, List[_Request]] = {}
+        for request in batch:
+            by_model.setdefault(request.rag.model_name, []).append(request)
+
+        embeddings = {}
+        for requests in by_model.values():
+            vectors = requests[0].rag.encode_queries([r.query for r in requests])
+            for request, vector in zip(requests, vectors):
+                embeddings[id(request)] = vector
+
+        # One index search per RAG system, at the largest top_k requested from it
+        by_rag: Dict[int, List[_Request]] = {}
+        for request in batch:
+            by_rag.setdefault(id(request.rag), []).append(request)
+
+        for requests in by_rag.values():
+            rag = requests[0].rag
+            top_k = max(r.top_k for r in requests)
+            try:
+                query_embeddings = np.stack([embeddings[id(r)] for r in requests])
+                results = rag.search_embeddings(query_embeddings, top_k, [r.query for r in requests])
+                for request, result in zip(requests, results):
+                    request.future.set_result(result[:request.top_k])
+            except Exception as e:
+                for request in requests:
+                    request.future.set_exception(e)
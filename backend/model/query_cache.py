@@ -0,0 +1,80 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query (the MiniLM encoder is uncased)."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+class LRUCache:
+    """Thread-safe bounded LRU map with hit/miss counters."""
+
+    def __init__(self, maxsize: int, max_bytes: int = 0, sizeof: Optional[Callable[[Any], int]] = None):
+        """
+        Args:
+            maxsize: Maximum number of entries kept (0 disables the cache).
+            max_bytes: Optional bound on the summed size of the values (0 means no bound).
+            sizeof: Returns the size in bytes of a value; required for max_bytes.
+        """
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        if self.maxsize <= 0:
+            return
+        size = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            self.total_bytes += size - self._sizes.get(key, 0)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._data.move_to_end(key)
+            # Always keep the newest entry, even if it alone exceeds the byte budget
+            while len(self._data) > self.maxsize or (self.max_bytes and self.total_bytes > self.max_bytes and len(self._data) > 1):
+                evicted, _ = self._data.popitem(last=False)
+                self.total_bytes -= self._sizes.pop(evicted)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove and return the value for key, if present."""
+        with self._lock:
+            if key not in self._data:
+                return None
+            self.total_bytes -= self._sizes.pop(key)
+            return self._data.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -1,31 +1,75 @@
+import copy
 import json
+import threading
 import numpy as np
 import faiss
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from model.ann_index import (configure_search, create_index, effective_index_type, effective_storage,
+                              estimate_index_bytes, supports_removal)
+from model.bm25 import BM25Index
+from model.config import Config
+from model.index_store import IndexStore, chunk_id, file_content_hash, store_key
+from model.model_registry import get_encoder
+from model.query_batcher import QueryBatcher
+from model.query_cache import LRUCache, normalize_query
+
+# (model name, normalized query) -> normalized query embedding
+embedding_cache = LRUCache(Config.EMBEDDING_CACHE_SIZE)
+# (transcript path, transcript version, index kind, normalized query, top_k) -> search results
+result_cache = LRUCache(Config.RESULT_CACHE_SIZE)
 
 class RAGSystem:
-    def __init__(self, json_path: str, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, json_path: str, model_name: str = Config.EMBEDDING_MODEL, index_dir: Optional[str] = Config.INDEX_DIR,
+                 index_type: str = Config.INDEX_TYPE, storage: str = Config.EMBEDDING_STORAGE, load: bool = True):
         """
         Initialize the RAG system with a JSON file and embedding model.
         
         Args:
             json_path: Path to the JSON file containing the text data.
             model_name: Name of the sentence-transformer model to use.
+            index_dir: Directory for the persistent index store, or None to always build in memory.
+            index_type: FAISS index type: flat, ivf_flat, ivf_pq or hnsw.
+            storage: Vector storage inside the index: float32, float16, sq8 or pq.
+            load: Load the JSON file now; pass False to start empty and fill with add_documents().
         """
         self.json_path = json_path
-        self.encoder = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.index_type = index_type
+        self.index_kind = None
+        self.storage = storage
+        self.storage_kind = None
         self.documents = []
+        self.doc_ids = []
         self.document_embeddings = None
+        self.embedding_ids = None
         self.index = None
+        self.content_hash = None
+        self.store = IndexStore(index_dir, store_key(json_path)) if index_dir else None
+        self._id_positions = {}
+        self.lexical_index = None
+        self.hybrid = Config.HYBRID_SEARCH
+        # _lock guards the searchable state and is only held to read or swap it; _update_lock serializes
+        # updates, which do their encoding and index building on a private copy
+        self._lock = threading.RLock()
+        self._update_lock = threading.Lock()
         
         # Load and process the JSON data
+        if not load:
+            return
         self.load_data()
-        self.build_index()
+        if not self.load_index():
+            self.build_index()
+            self.save_index()
         
+    @property
+    def encoder(self):
+        """The shared sentence-transformer, (re)loaded through the model registry on demand."""
+        return get_encoder(self.model_name)
+
     def load_data(self) -> None:
         """Load and process the JSON data."""
         try:
+            self.content_hash = file_content_hash(self.json_path)
             with open(self.json_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
 
@@ -54,6 +98,40 @@ class RAGSystem:
         except Exception as e:
             print(f"Error loading data: {e}")
             self.documents = []
+
+        self.assign_ids()
+        self.lexical_index = BM25Index([doc["content"] for doc in self.documents])
+
+    def assign_ids(self) -> None:
+        """Give every document a stable id derived from its content."""
+        occurrences = {}
+        self.doc_ids = []
+        for doc in self.documents:
+            seen = occurrences.get(doc["content"], 0)
+            occurrences[doc["content"]] = seen + 1
+            self.doc_ids.append(chunk_id(doc["content"], seen))
+        self._id_positions = {doc_id: pos for pos, doc_id in enumerate(self.doc_ids)}
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Encode queries into normalized float32 vectors, reusing cached embeddings of repeated queries."""
+        keys = [(self.model_name, normalize_query(q)) for q in queries]
+        vectors = [embedding_cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = self.encode_texts([keys[i][1] for i in missing])
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+                embedding_cache.put(keys[i], vector)
+        return np.stack(vectors)
+
+    def encode_texts(self, texts: List[str], show_progress_bar: bool = False) -> np.ndarray:
+        """Encode texts into normalized float32 vectors."""
+        embeddings = self.encoder.encode(texts, show_progress_bar=show_progress_bar)
+        
+        # Convert to float32 (required by FAISS)
+        embeddings = np.array(embeddings).astype('float32')
+        faiss.normalize_L2(embeddings)  # Normalize vectors
+        return embeddings
     
     def build_index(self) -> None:
         """Create FAISS index from document embeddings."""
@@ -65,18 +143,201 @@ class RAGSystem:
         texts = [doc["content"] for doc in self.documents]
         
         # Generate embeddings
-        self.document_embeddings = self.encoder.encode(texts, show_progress_bar=True)
-        
-        # Convert to float32 (required by FAISS)
-        self.document_embeddings = np.array(self.document_embeddings).astype('float32')
+        self.document_embeddings = self.encode_texts(texts, show_progress_bar=True)
+        self.embedding_ids = np.array(self.doc_ids, dtype='int64')
         
-        # Create and train the FAISS index
+        # Create and train the FAISS index, addressed by stable chunk ids
         dimension = self.document_embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)  # Using L2 distance
-        faiss.normalize_L2(self.document_embeddings)  # Normalize vectors
-        self.index.add(self.document_embeddings)
+        self.index, self.index_kind, self.storage_kind = create_index(
+            self.index_type, self.document_embeddings, self.embedding_ids, self.storage)
         
-        print(f"Created FAISS index with {self.index.ntotal} vectors of dimension {dimension}")
+        print(f"Created {self.index_kind}/{self.storage_kind} FAISS index with {self.index.ntotal} vectors of dimension {dimension}")
+
+    def load_index(self) -> bool:
+        """
+        Load the stored index for this transcript, updating it incrementally if the transcript changed.
+
+        Returns:
+            True if a usable stored index was found.
+        """
+        if not self.store or not self.documents:
+            return False
+        stored = self.store.load()
+        if not stored:
+            return False
+
+        index, embeddings, ids, manifest = stored
+        if manifest.get("model") != self.model_name:
+            print(f"Stored index at {self.store.path} was built with another encoder, rebuilding")
+            return False
+
+        self.index = index
+        self.index_kind = manifest.get("index_kind", "flat")
+        self.storage_kind = manifest.get("storage", "float32")
+        self.document_embeddings = embeddings
+        self.embedding_ids = ids
+        # Only self may reference the memory-mapped embeddings when save_index replaces their file
+        del stored, embeddings
+        configure_search(self.index, self.index_kind)
+        print(f"Loaded {self.index_kind}/{self.storage_kind} FAISS index with {self.index.ntotal} vectors from {self.store.path}")
+
+        if manifest.get("version") != self.content_hash:
+            self.update_index()
+            self.save_index()
+        elif self.layout_for(self.index.ntotal) != (self.index_kind, self.storage_kind):
+            self.rebuild_index()
+            self.save_index()
+        return True
+
+    def layout_for(self, n_vectors: int) -> tuple:
+        """The (index kind, storage) this system should use for a corpus of n_vectors."""
+        index_kind = effective_index_type(self.index_type, n_vectors)
+        return index_kind, effective_storage(self.storage, index_kind, n_vectors)
+
+    def update_index(self) -> None:
+        """Embed and add only new chunks, and remove chunks that are no longer in the transcript."""
+        current_ids = np.array(self.doc_ids, dtype='int64')
+        stored_ids = np.asarray(self.embedding_ids, dtype='int64')
+
+        removed = np.setdiff1d(stored_ids, current_ids)
+        new_positions = np.flatnonzero(~np.isin(current_ids, stored_ids))
+        if not len(removed) and not len(new_positions):
+            return
+
+        keep = np.isin(stored_ids, current_ids)
+        # Without a float32 copy (compressed storage, no store) only the index itself is updated
+        embeddings = np.asarray(self.document_embeddings)[keep] if self.document_embeddings is not None else None
+        ids = stored_ids[keep]
+        new_embeddings = None
+        if len(new_positions):
+            texts = [self.documents[pos]["content"] for pos in new_positions]
+            new_embeddings = self.encode_texts(texts, show_progress_bar=len(texts) > 100)
+            new_ids = current_ids[new_positions]
+            if embeddings is not None:
+                embeddings = np.vstack([embeddings, new_embeddings])
+            ids = np.concatenate([ids, new_ids])
+
+        self.document_embeddings = embeddings
+        self.embedding_ids = ids
+
+        # Retrain when the corpus crossed a size threshold or the index cannot delete in place
+        if self.layout_for(len(ids)) != (self.index_kind, self.storage_kind) or \
+                (len(removed) and not supports_removal(self.index_kind)):
+            self.rebuild_index()
+        else:
+            if len(removed):
+                self.index.remove_ids(removed)
+            if new_embeddings is not None:
+                self.index.add_with_ids(new_embeddings, new_ids)
+        print(f"Updated FAISS index: {len(new_positions)} chunks added, {len(removed)} removed")
+
+    def rebuild_index(self) -> None:
+        """Rebuild the index from the stored embeddings, re-encoding only if no float32 copy is kept."""
+        if self.document_embeddings is None:
+            self.index = None
+            self.build_index()
+            return
+        if not len(self.document_embeddings):
+            self.index, self.index_kind, self.storage_kind = None, None, None
+            return
+        self.index, self.index_kind, self.storage_kind = create_index(
+            self.index_type, self.document_embeddings, self.embedding_ids, self.storage)
+        print(f"Rebuilt {self.index_kind}/{self.storage_kind} FAISS index with {self.index.ntotal} vectors")
+
+    def _staged_copy(self) -> "RAGSystem":
+        """A copy to update off the search path: shares nothing that updates mutate in place."""
+        with self._lock:
+            staged = copy.copy(self)
+            staged.documents = list(self.documents)
+            if self.index is not None:
+                staged.index = faiss.clone_index(self.index)
+        return staged
+
+    def _swap_in(self, staged: "RAGSystem") -> None:
+        """Publish the state of an updated copy; searches see either the old or the new state, never a mix."""
+        with self._lock:
+            for attr in _SEARCH_STATE:
+                setattr(self, attr, getattr(staged, attr))
+
+    def refresh(self) -> None:
+        """Reload the transcript and bring the index up to date with it, without blocking searches meanwhile."""
+        with self._update_lock:
+            staged = self._staged_copy()
+            staged.load_data()
+            if staged.index is None or not staged.documents:
+                staged.index = None
+                staged.build_index()
+            else:
+                staged.update_index()
+            self._swap_in(staged)
+            # Drop the copy's references (e.g. to the memory-mapped embeddings file) before saving replaces files
+            del staged
+            self.save_index()
+
+    def add_documents(self, documents: List[Dict[str, Any]]) -> None:
+        """
+        Append documents while a transcript is still being produced, embedding only the new ones.
+
+        Args:
+            documents: Documents shaped like those from load_data ({"content", "metadata"}).
+        """
+        with self._update_lock:
+            staged = self._staged_copy()
+            staged.documents.extend(documents)
+            staged.assign_ids()
+            if staged.index is None:
+                staged.build_index()
+            else:
+                staged.update_index()
+            self._swap_in(staged)
+
+    def memory_bytes(self) -> int:
+        """Estimate how much memory this RAG system holds, for the loaded-index cache budget."""
+        total = 0
+        if self.index is not None:
+            total += estimate_index_bytes(self.index_kind, self.index.ntotal, self.index.d, self.storage_kind)
+        # Memory-mapped embeddings are paged by the OS and not counted
+        if self.document_embeddings is not None and not isinstance(self.document_embeddings, np.memmap):
+            total += self.document_embeddings.nbytes
+        # Document text, metadata and BM25 postings, roughly
+        total += 3 * sum(len(doc["content"]) for doc in self.documents)
+        return total
+
+    def save_index(self) -> None:
+        """Persist the index so later processes can skip encoding, then drop the in-memory embedding copy."""
+        if self.index is None:
+            return
+        if not self.store:
+            self.release_embeddings(saved=False)
+            return
+        if isinstance(self.document_embeddings, np.memmap):
+            # Still the mapping of embeddings.npy (nothing changed them, or a layout-only rebuild). Windows cannot
+            # replace a mapped file, so read them into memory and drop the mapping first.
+            self.document_embeddings = np.array(self.document_embeddings)
+        try:
+            manifest = {"version": self.content_hash, "model": self.model_name,
+                        "index_kind": self.index_kind, "storage": self.storage_kind}
+            self.store.save(self.index, self.document_embeddings, self.embedding_ids, manifest)
+            print(f"Saved FAISS index to {self.store.path}")
+            self.release_embeddings(saved=True)
+        except Exception as e:
+            print(f"Error saving index: {e}")
+
+    def release_embeddings(self, saved: bool) -> None:
+        """
+        Avoid holding every vector twice (once in the index, once as a numpy array).
+
+        Args:
+            saved: Whether the current embeddings were just written to the store.
+        """
+        if saved:
+            # Keep only a memory-mapped view of what is on disk for later rebuilds
+            embeddings = self.store.load_embeddings()
+            if embeddings is not None:
+                self.document_embeddings = embeddings
+        elif self.storage_kind != "float32":
+            # Nothing on disk to fall back to; rebuilds will re-encode the documents
+            self.document_embeddings = None
     
     def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """
@@ -89,48 +350,202 @@ class RAGSystem:
         Returns:
             List of documents with similarity scores.
         """
-        if not self.index:
-            return []
-        
-        # Encode the query
-        query_embedding = self.encoder.encode([query])
-        query_embedding = np.array(query_embedding).astype('float32')
-        faiss.normalize_L2(query_embedding)
+        return self.search_batch([query], top_k)[0]
+
+    def search_batch(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several queries with one encoder pass and one index search.
+
+        Args:
+            queries: The search queries.
+            top_k: Number of results to return per query.
+
+        Returns:
+            One list of documents with similarity scores per query.
+        """
+        if self.index is None:
+            return [[] for _ in queries]
         
+        # Encode the queries
+        query_embeddings = self.encode_queries(queries)
+        return self.search_embeddings(query_embeddings, top_k, queries)
+
+    def search_embeddings(self, query_embeddings: np.ndarray, top_k: int = 5,
+                          queries: Optional[List[str]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Search the index with already encoded, normalized query vectors.
+
+        Args:
+            query_embeddings: float32 array with one row per query.
+            top_k: Number of results to return per query.
+            queries: The query texts; when given and hybrid search is on, BM25 hits are fused in.
+
+        Returns:
+            One list of documents per query row. "score" is always the vector similarity to the query
+            (1 - squared L2 distance of the normalized vectors); with hybrid search the ranking follows
+            "fused_score", the reciprocal rank fusion value.
+        """
+        hybrid = self.hybrid and queries is not None
+        depth = max(top_k, Config.HYBRID_CANDIDATES) if hybrid else top_k
+
         # Search the index
-        distances, indices = self.index.search(query_embedding, top_k)
+        with self._lock:
+            if self.index is None:
+                return [[] for _ in range(len(query_embeddings))]
+            distances, indices = self.index.search(query_embeddings, depth)
+            documents, positions, lexical_index = self.documents, self._id_positions, self.lexical_index
+            embeddings, embedding_ids, doc_ids = self.document_embeddings, self.embedding_ids, self.doc_ids
         
         # Prepare results
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx != -1:  # Valid index
-                results.append({
-                    "id": self.documents[idx]["metadata"].get("id", f"doc_{idx}"),
-                    "content": self.documents[idx]["content"],
-                    "metadata": self.documents[idx]["metadata"],
-                    "score": float(1 - distances[0][i])  # Convert distance to similarity score
-                })
+        batch_results = []
+        for row in range(len(query_embeddings)):
+            vector_hits = []
+            for i, doc_id in enumerate(indices[row]):
+                idx = positions.get(int(doc_id))
+                if idx is not None:  # Valid index
+                    vector_hits.append((idx, float(1 - distances[row][i])))  # Convert distance to similarity score
+
+            if hybrid:
+                lexical_hits = lexical_index.search(queries[row], depth) if lexical_index else []
+                similarity = dict(vector_hits)
+                hits = []
+                for idx, fused in self.fuse_rankings(vector_hits, lexical_hits)[:top_k]:
+                    score = similarity.get(idx)
+                    if score is None:
+                        score = self._lexical_similarity(query_embeddings[row], doc_ids[idx], embeddings,
+                                                         embedding_ids, vector_hits)
+                    hits.append((idx, score, fused))
+            else:
+                hits = [(idx, score, None) for idx, score in vector_hits[:top_k]]
+
+            results = []
+            for idx, score, fused in hits:
+                result = {
+                    "id": documents[idx]["metadata"].get("id", f"doc_{idx}"),
+                    "content": documents[idx]["content"],
+                    "metadata": documents[idx]["metadata"],
+                    "score": score
+                }
+                if fused is not None:
+                    result["fused_score"] = fused
+                results.append(result)
+            batch_results.append(results)
         
-        return results
+        return batch_results
+
+    @staticmethod
+    def _lexical_similarity(query_embedding: np.ndarray, doc_id: int, embeddings: Optional[np.ndarray],
+                            embedding_ids: Optional[np.ndarray], vector_hits: List[tuple]) -> float:
+        """
+        Vector similarity of a BM25-only hit, which the vector search did not return, on the same scale as the
+        vector scores. Exact when the float32 embeddings are kept; otherwise the weakest vector candidate's
+        similarity, an upper bound for it.
+        """
+        if embeddings is not None and embedding_ids is not None:
+            rows = np.flatnonzero(np.asarray(embedding_ids) == doc_id)
+            if len(rows):
+                return float(1 - np.sum((embeddings[rows[0]] - query_embedding) ** 2))
+        return min((score for _, score in vector_hits), default=0.0)
+
+    @staticmethod
+    def fuse_rankings(*rankings, k: int = Config.RRF_K) -> List[tuple]:
+        """
+        Combine ranked (position, score) lists with reciprocal rank fusion.
+
+        Returns:
+            List of (document position, fused score), best first.
+        """
+        fused = {}
+        for ranking in rankings:
+            for rank, (idx, _) in enumerate(ranking):
+                fused[idx] = fused.get(idx, 0.0) + 1.0 / (k + rank + 1)
+        return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+# Attributes that updates replace and searches read, swapped together under RAGSystem._lock
+_SEARCH_STATE = ("documents", "doc_ids", "_id_positions", "lexical_index", "content_hash", "document_embeddings",
+                 "embedding_ids", "index", "index_kind", "storage_kind")
+
+# (json_path) -> RAGSystem; hot transcripts stay loaded, cold ones are evicted and reload from the index store
+_rag_systems = LRUCache(Config.RAG_CACHE_MAX_INDEXES, max_bytes=Config.RAG_CACHE_MB * 1024 * 1024,
+                        sizeof=lambda rag: rag.memory_bytes())
+_rag_lock = threading.Lock()
+_load_locks: Dict[str, threading.Lock] = {}
+
+# Coalesces concurrent chat queries into batched encoder and index calls
+query_batcher = QueryBatcher()
+
+def get_rag_system(json_path: str) -> RAGSystem:
+    """
+    Return the process-wide RAG system for a transcript, refreshing it incrementally when the file content changes.
+    While another thread is refreshing it, the current (stale) instance is returned instead of waiting for the refresh.
+
+    Args:
+        json_path: Path to the JSON file containing the text data.
+
+    Returns:
+        A RAGSystem whose index matches the current file contents.
+    """
+    try:
+        content_hash = file_content_hash(json_path)
+    except OSError:
+        content_hash = None
+
+    # Loads and refreshes of one transcript never block queries against another
+    with _rag_lock:
+        load_lock = _load_locks.setdefault(json_path, threading.Lock())
+    rag = _rag_systems.get(json_path)
+    if rag is not None and rag.content_hash == content_hash:
+        return rag
+    # Only a first load has nothing to serve meanwhile; a refresh swaps its state in atomically, so queries
+    # can keep using the old index until it is done
+    if not load_lock.acquire(blocking=rag is None):
+        return rag
+    try:
+        rag = _rag_systems.get(json_path)
+        if rag is None:
+            rag = RAGSystem(json_path)
+        elif rag.content_hash != content_hash:
+            rag.refresh()
+        else:
+            return rag
+        # (Re-)insert so the cache accounts for the current size
+        _rag_systems.put(json_path, rag)
+        return rag
+    finally:
+        load_lock.release()
+
+def register_rag_system(json_path: str, rag: RAGSystem) -> None:
+    """Make an already built RAG system (e.g. from streaming ingestion) the one served for json_path."""
+    _rag_systems.put(json_path, rag)
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters of the query-embedding, retrieval-result and loaded-index caches."""
+    return {"embeddings": embedding_cache.stats(), "results": result_cache.stats(), "indexes": _rag_systems.stats()}
 
-def rag_main(query: str) -> str:
+def rag_main(query: str, video_id: Optional[str] = None) -> str:
     """
     Main function to initialize RAG and perform search.
 
     Args:
         query: The input query string.
+        video_id: Video whose transcript to search; falls back to the shared single.json when omitted.
 
     Returns:
         A formatted string of search results.
     """
     # Path to your JSON file
-    json_path = r"A:\Projects\Edu_Pro\backend\data\single.json"
+    json_path = Config.transcript_path(video_id) if video_id else Config.SINGLE_TRANSCRIPT_PATH
     
-    # Initialize the RAG system
-    rag = RAGSystem(json_path)
+    # Reuse the RAG system loaded for this transcript version
+    rag = get_rag_system(json_path)
     
-    # Get results
-    results = rag.search(query, top_k=3)
+    # Get results, reusing those of an identical question against the same transcript version
+    top_k = Config.RAG_TOP_K
+    cache_key = (json_path, rag.content_hash, rag.index_kind, normalize_query(query), top_k)
+    results = result_cache.get(cache_key)
+    if results is None:
+        results = query_batcher.search(rag, query, top_k=top_k)
+        result_cache.put(cache_key, results)
     
     # Display results
     if not results:
@@ -0,0 +1,54 @@
+import random
+import threading
+import time
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every worker that talks to one rate-limited service."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate: Tokens added per second (sustained requests per second).
+            capacity: Largest burst allowed; defaults to one second's worth of tokens (at least 1).
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next seconds, e.g. after the service signalled throttling."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # No burst right after the pause either
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """
+    Exponential backoff with full jitter, so throttled workers do not retry in lockstep.
+
+    Args:
+        attempt: Zero-based retry number.
+        base: Delay scale of the first retry in seconds.
+        cap: Upper bound on any single delay.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
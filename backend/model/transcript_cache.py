@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from model.config import Config
+
+class TranscriptCache:
+    """
+    On-disk cache of transcript segments keyed by (video ID, source, model size, language).
+
+    Each entry is one JSON file. Its mtime records when it was created (for the TTL) and its
+    atime when it was last read (for size-based LRU eviction).
+    """
+
+    def __init__(self, root_dir: str, ttl_seconds: float = Config.TRANSCRIPT_CACHE_TTL,
+                 max_bytes: int = Config.TRANSCRIPT_CACHE_MB * 1024 * 1024):
+        """
+        Args:
+            root_dir: Directory holding the cache entries.
+            ttl_seconds: Age after which an entry is discarded (0 keeps entries forever).
+            max_bytes: Total size the cache is trimmed to after each write (0 means unbounded).
+        """
+        self.root_dir = root_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cache_key(video_id: str, source: str, model: Optional[str] = None, language: Optional[str] = None) -> str:
+        """
+        Args:
+            video_id: YouTube video ID.
+            source: "captions" or the ASR backend name (whisper, faster_whisper, google).
+            model: ASR model size, or None for captions.
+            language: Requested language, or None for auto-detection.
+
+        Returns:
+            Hex digest naming the entry.
+        """
+        raw = json.dumps([video_id, source, model or "", language or ""])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root_dir, f"{key}.json")
+
+    def _expired(self, mtime: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - mtime > self.ttl_seconds
+
+    def get(self, video_id: str, source: str, model: Optional[str] = None,
+            language: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return the cached segments, or None when missing or expired.
+        """
+        path = self.path(self.cache_key(video_id, source, model, language))
+        now = time.time()
+        try:
+            stat = os.stat(path)
+            if self._expired(stat.st_mtime, now):
+                os.remove(path)
+                self.misses += 1
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                segments = json.load(f)["segments"]
+            # Record the access without touching the creation time
+            os.utime(path, (now, stat.st_mtime))
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return segments
+
+    def put(self, video_id: str, source: str, segments: List[Dict[str, Any]], model: Optional[str] = None,
+            language: Optional[str] = None) -> None:
+        """
+        Store segments atomically, then trim the cache to its size budget.
+        """
+        os.makedirs(self.root_dir, exist_ok=True)
+        path = self.path(self.cache_key(video_id, source, model, language))
+        entry = {"video_id": video_id, "source": source, "model": model, "language": language, "segments": segments}
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def lock(self, video_id: str, source: str, model: Optional[str] = None, language: Optional[str] = None) -> threading.Lock:
+        """Per-entry lock, so concurrent requests for one video produce its transcript only once."""
+        key = self.cache_key(video_id, source, model, language)
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get_or_create(self, video_id: str, source: str, produce: Callable[[], List[Dict[str, Any]]],
+                      model: Optional[str] = None, language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Return cached segments, or call produce() once (even under concurrent callers) and cache its result.
+        """
+        with self.lock(video_id, source, model, language):
+            segments = self.get(video_id, source, model, language)
+            if segments is None:
+                segments = produce()
+                self.put(video_id, source, segments, model, language)
+            return segments
+
+    def evict(self) -> int:
+        """
+        Remove expired entries, then the least recently read ones until the cache fits max_bytes.
+
+        Returns:
+            Number of entries removed.
+        """
+        try:
+            names = [name for name in os.listdir(self.root_dir) if name.endswith(".json")]
+        except OSError:
+            return 0
+        now = time.time()
+        entries = []
+        removed = 0
+        for name in names:
+            path = os.path.join(self.root_dir, name)
+            try:
+                stat = os.stat(path)
+                if self._expired(stat.st_mtime, now):
+                    os.remove(path)
+                    removed += 1
+                else:
+                    entries.append((stat.st_atime, stat.st_size, path))
+            except OSError:
+                continue
+        if self.max_bytes:
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    removed += 1
+                    total -= size
+                except OSError:
+                    continue
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+# Process-wide cache shared by caption fetching and speech recognition
+transcript_cache = TranscriptCache(Config.TRANSCRIPT_CACHE_DIR)
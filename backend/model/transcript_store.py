@@ -0,0 +1,159 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from model.config import Config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    segment_count INTEGER NOT NULL,
+    added_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    video_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    start REAL NOT NULL,
+    duration REAL NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (video_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS failures (
+    video_id TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    failed_at REAL NOT NULL
+);
+"""
+
+class TranscriptStore:
+    """
+    SQLite store of caption segments for bulk-ingested videos.
+
+    Each video's segments are written in a single transaction, so readers see all of a video or none of it,
+    and ingesting a video costs only its own rows. The (video_id, seq) primary key is the per-video index
+    that lets one video be read without scanning the rest of the corpus.
+    """
+
+    def __init__(self, db_path: str = Config.TRANSCRIPT_DB_PATH):
+        """
+        Args:
+            db_path: Path of the SQLite database file; created on first use.
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections must not be shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            # WAL lets readers load videos while an ingest is writing
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def append(self, video_id: str, segments: Iterable[Dict[str, Any]], source: str = "captions") -> int:
+        """
+        Store a video's segments atomically, replacing any earlier copy of that video.
+
+        Args:
+            video_id: YouTube video ID.
+            segments: Caption segments with 'start', 'duration' and 'text' (Whisper-style 'end' is converted).
+            source: Where the segments came from, e.g. "captions" or "whisper".
+
+        Returns:
+            Number of segments written.
+        """
+        rows = []
+        for seq, segment in enumerate(segments):
+            duration = segment.get("duration")
+            if duration is None:
+                duration = segment.get("end", segment["start"]) - segment["start"]
+            rows.append((video_id, seq, float(segment["start"]), float(duration), segment["text"]))
+
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM segments WHERE video_id = ?", (video_id,))
+            conn.executemany("INSERT INTO segments (video_id, seq, start, duration, text) VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO videos (video_id, source, segment_count, added_at) VALUES (?, ?, ?, ?)",
+                         (video_id, source, len(rows), time.time()))
+            conn.execute("DELETE FROM failures WHERE video_id = ?", (video_id,))
+        return len(rows)
+
+    def mark_failed(self, video_id: str, reason: str) -> None:
+        """Record a video that has no usable transcript, so resumed imports do not ask for it again."""
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO failures (video_id, reason, failed_at) VALUES (?, ?, ?)",
+                         (video_id, reason, time.time()))
+
+    def failed_ids(self) -> Dict[str, str]:
+        """Map of video ID to the reason its transcript could not be fetched."""
+        return dict(self._connection().execute("SELECT video_id, reason FROM failures").fetchall())
+
+    def has_video(self, video_id: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return row is not None
+
+    def video_ids(self) -> List[str]:
+        """IDs of all stored videos, in ingestion order."""
+        rows = self._connection().execute("SELECT video_id FROM videos ORDER BY added_at").fetchall()
+        return [row[0] for row in rows]
+
+    def load(self, video_id: str) -> List[Dict[str, Any]]:
+        """
+        Read one video's segments in time order.
+
+        Returns:
+            Segments shaped like youtube_transcript_api output ({"text", "start", "duration"}).
+        """
+        rows = self._connection().execute(
+            "SELECT start, duration, text FROM segments WHERE video_id = ? ORDER BY seq", (video_id,)).fetchall()
+        return [{"text": text, "start": start, "duration": duration} for start, duration, text in rows]
+
+    def iter_segments(self, video_ids: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream segments of the given videos (all videos by default) without loading the corpus into memory.
+
+        Yields:
+            Segments with 'video_id', 'start', 'duration' and 'text'.
+        """
+        for video_id in video_ids if video_ids is not None else self.video_ids():
+            for segment in self.load(video_id):
+                segment["video_id"] = video_id
+                yield segment
+
+    def import_legacy_json(self, json_path: str, video_id: str = "legacy") -> int:
+        """
+        Migrate a multi.json file written by older versions. That format did not record which video
+        a segment came from, so everything is stored under one placeholder video ID.
+
+        Returns:
+            Number of segments imported (0 if the file is missing or unreadable).
+        """
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                segments = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if not isinstance(segments, list):
+            return 0
+        return self.append(video_id, segments, source="legacy")
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
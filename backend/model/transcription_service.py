@@ -0,0 +1,225 @@
+import collections
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
+from model.asr import get_asr_backend
+from model.audio_stream import SAMPLE_RATE, pcm_chunks
+from model.config import Config
+from model.vad import split_on_silence
+
+# Approximate resident memory of one worker process holding each Whisper size (MB)
+WHISPER_WORKER_MB = {"tiny": 400, "base": 600, "small": 1200, "medium": 3000, "large": 6000}
+
+# The ASR backend (with its model pinned) held by this process when it is a pool worker
+_worker_backend = None
+
+def audio_chunks(audio, window_seconds=Config.STREAM_WINDOW_SECONDS, headers=None):
+    """
+    Splits audio at pauses into chunks of about window_seconds.
+
+    Parameters:
+        audio: 16 kHz mono float32 samples, or a path/URL that is decoded through an ffmpeg pipe
+            (no temporary file) and chunked while it is still being read.
+        window_seconds (int): Preferred chunk length.
+        headers (dict): HTTP headers for URL sources.
+
+    Yields:
+        tuple: (offset of the chunk in samples, samples of the chunk).
+    """
+    if isinstance(audio, np.ndarray):
+        for start, end in split_on_silence(audio, SAMPLE_RATE, target_seconds=window_seconds):
+            yield start, audio[start:end]
+    else:
+        yield from pcm_chunks(audio, headers, target_seconds=window_seconds)
+
+def stream_segments(backend, audio, window_seconds=Config.STREAM_WINDOW_SECONDS, headers=None):
+    """
+    Transcribes audio chunk by chunk, yielding segments as soon as each chunk is done.
+
+    Parameters:
+        backend (ASRBackend): The speech recognizer, see model.asr.
+        audio: 16 kHz mono float32 samples, or a path/URL to decode.
+        window_seconds (int): Preferred chunk length; chunks are cut at pauses.
+        headers (dict): HTTP headers for URL sources.
+
+    Yields:
+        dict: Segments with 'start', 'end' and 'text', timestamps relative to the whole input.
+    """
+    previous_text = None
+    for offset, chunk in audio_chunks(audio, window_seconds, headers):
+        # Prompt each chunk with the end of the previous one so context carries over the cut
+        segments, text = backend.transcribe(chunk, offset / SAMPLE_RATE, previous_text)
+        yield from segments
+        previous_text = text[-200:] or None
+
+def _available_memory_mb():
+    """Free physical memory in MB, or None where the platform does not expose it."""
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def worker_memory_mb(backend=Config.ASR_BACKEND, model_size=Config.WHISPER_MODEL):
+    """Approximate resident memory of one worker process running the given backend (MB)."""
+    if backend == "faster_whisper":
+        return Config.FASTER_WHISPER_MB.get(model_size, Config.FASTER_WHISPER_MB["large"]) + 200
+    if backend == "google":
+        return 150
+    return WHISPER_WORKER_MB.get(model_size, WHISPER_WORKER_MB["large"])
+
+def default_worker_count(model_size=Config.WHISPER_MODEL, backend=Config.ASR_BACKEND):
+    """
+    Number of transcription workers this machine can run: at least two CPU threads per worker,
+    and no more workers than free memory can hold.
+    """
+    by_cores = max(1, (os.cpu_count() or 1) // 2)
+    available_mb = _available_memory_mb()
+    if available_mb is None:
+        return by_cores
+    by_memory = max(1, available_mb // worker_memory_mb(backend, model_size))
+    return min(by_cores, by_memory)
+
+def _init_worker(backend, model_size, compute_type, num_threads):
+    """Pool initializer: load the ASR model once per worker process, capped to its share of CPU threads."""
+    global _worker_backend
+    _worker_backend = get_asr_backend(backend, model_size, compute_type, cpu_threads=num_threads)
+    _worker_backend.pin()
+
+def _ping():
+    return os.getpid()
+
+def _segment_fields(segment):
+    # Only what downstream grouping needs crosses the process boundary
+    return {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+
+def _transcribe_job(audio, window_seconds, headers):
+    return [_segment_fields(s) for s in stream_segments(_worker_backend, audio, window_seconds, headers)]
+
+def _transcribe_chunk_job(audio, offset_seconds):
+    segments, _ = _worker_backend.transcribe(audio, offset_seconds)
+    return [_segment_fields(s) for s in segments]
+
+def _stream_job(audio, window_seconds, headers, out_queue):
+    try:
+        for segment in stream_segments(_worker_backend, audio, window_seconds, headers):
+            out_queue.put(_segment_fields(segment))
+    finally:
+        out_queue.put(None)
+
+class TranscriptionService:
+    """Pool of worker processes, each holding a pre-loaded ASR model, that transcribe audio files and chunks in parallel."""
+
+    def __init__(self, num_workers=None, backend=Config.ASR_BACKEND, model_size=Config.WHISPER_MODEL,
+                 compute_type=Config.ASR_COMPUTE_TYPE):
+        """
+        Parameters:
+            num_workers (int): Worker processes to run; sized from cores and memory when omitted.
+            backend (str): ASR backend every worker runs (see model.asr.ASR_BACKENDS).
+            model_size (str): Whisper model size every worker loads.
+            compute_type (str): Weight precision for backends that support it.
+        """
+        self.backend = backend
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.num_workers = num_workers or default_worker_count(model_size, backend)
+        threads_per_worker = max(1, (os.cpu_count() or 1) // self.num_workers)
+        self._executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_worker,
+                                             initargs=(backend, model_size, compute_type, threads_per_worker))
+        self._manager = None
+        self._lock = threading.Lock()
+        print(f"Transcription service: {self.num_workers} workers x {threads_per_worker} threads, "
+              f"{backend} {get_asr_backend(backend, model_size, compute_type).model_id}")
+
+    def warmup(self):
+        """Start every worker and wait until each has loaded its model."""
+        wait([self._executor.submit(_ping) for _ in range(self.num_workers)])
+
+    def transcribe(self, audio, window_seconds=Config.STREAM_WINDOW_SECONDS, headers=None):
+        """
+        Queue audio (samples, path or URL) for transcription.
+
+        Returns:
+            Future: Resolves to the list of segments with absolute 'start', 'end' and 'text'.
+        """
+        return self._executor.submit(_transcribe_job, audio, window_seconds, headers)
+
+    def stream_parallel(self, audio, window_seconds=Config.STREAM_WINDOW_SECONDS, headers=None):
+        """
+        Split audio at pauses and transcribe the chunks on all workers at once. Path and URL
+        sources are decoded through an ffmpeg pipe, so chunks are handed to workers while the
+        rest of the audio is still downloading.
+
+        Yields:
+            dict: Segments with absolute 'start', 'end' and 'text', in time order, as soon as
+            every earlier chunk is done.
+        """
+        # At most two chunks per worker in flight: decoding is much faster than transcription, so without
+        # a cap every chunk of a long lecture would be submitted and its samples held in memory
+        max_in_flight = 2 * self.num_workers
+        pending = collections.deque()
+        try:
+            for offset, chunk in audio_chunks(audio, window_seconds, headers):
+                while len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()
+                pending.append(self._executor.submit(_transcribe_chunk_job, chunk, offset / SAMPLE_RATE))
+                while pending and pending[0].done():
+                    yield from pending.popleft().result()
+            print(f"Decoded all audio; waiting on {len(pending)} chunks")
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def stream(self, audio, window_seconds=Config.STREAM_WINDOW_SECONDS, headers=None):
+        """
+        Transcribe audio on a single worker, yielding segments as the worker produces them.
+
+        Yields:
+            dict: Segments with absolute 'start', 'end' and 'text'.
+        """
+        out_queue = self._get_manager().Queue()
+        future = self._executor.submit(_stream_job, audio, window_seconds, headers, out_queue)
+        while True:
+            try:
+                segment = out_queue.get(timeout=1)
+            except queue.Empty:
+                if future.done() and future.exception():
+                    raise future.exception()
+                continue
+            if segment is None:
+                break
+            yield segment
+        future.result()  # re-raise a worker failure that happened after the last segment
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        if self._manager:
+            self._manager.shutdown()
+
+    def _get_manager(self):
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return self._manager
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_transcription_service():
+    """
+    Return the process-wide transcription pool, or None when Config.TRANSCRIPTION_WORKERS is 0
+    (transcribe in the calling process instead).
+    """
+    global _service
+    if Config.TRANSCRIPTION_WORKERS == "0":
+        return None
+    with _service_lock:
+        if _service is None:
+            num_workers = None if Config.TRANSCRIPTION_WORKERS == "auto" else int(Config.TRANSCRIPTION_WORKERS)
+            _service = TranscriptionService(num_workers)
+            _service.warmup()
+        return _service
@@ -1,46 +1,84 @@
-import youtube_dl
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import speech_recognition as sr
-import os
+from model.audio_stream import SAMPLE_RATE, resolve_audio_source, stream_pcm
+from model.config import Config
 
-def download_audio(url, output_file):
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'wav',
-            'preferredquality': '192',
-        }],
-        'outtmpl': output_file,
-    }
-    with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-        ydl.download([url])
-
-def transcribe_audio(audio_file):
+def recognize_window(audio):
     recognizer = sr.Recognizer()
-    with sr.AudioFile(audio_file) as source:
-        audio = recognizer.record(source)
-    
     try:
-        text = recognizer.recognize_google(audio)
-        return text
+        return recognizer.recognize_google(audio)
     except sr.UnknownValueError:
-        print("Speech recognition could not understand the audio")
+        return ""
     except sr.RequestError as e:
         print(f"Could not request results from the speech recognition service; {e}")
+        return ""
+
+def audio_windows(source, headers=None, window_seconds=Config.SR_WINDOW_SECONDS, overlap_seconds=Config.SR_OVERLAP_SECONDS):
+    # Read 16 kHz mono 16-bit PCM from the ffmpeg pipe and cut it into overlapping windows,
+    # so only one window (plus the overlap) is ever held in memory
+    window = int(window_seconds * SAMPLE_RATE)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    buffer = np.zeros(0, dtype='<i2')
+    emitted = False
+    for block in stream_pcm(source, headers, sample_format="s16le"):
+        buffer = np.concatenate([buffer, block])
+        while len(buffer) >= window:
+            yield sr.AudioData(buffer[:window].tobytes(), SAMPLE_RATE, 2)
+            buffer = buffer[window - overlap:]
+            emitted = True
+    # The remainder, unless it is only the overlap already sent with the last window
+    if len(buffer) > (overlap if emitted else 0):
+        yield sr.AudioData(buffer.tobytes(), SAMPLE_RATE, 2)
+
+def strip_overlap(previous_words, text, max_words=20):
+    # Drop the words a window repeats from the end of the previous one (the overlapping audio)
+    words = text.split()
+    tail = [w.lower() for w in previous_words[-max_words:]]
+    for k in range(min(len(tail), len(words)), 0, -1):
+        if tail[-k:] == [w.lower() for w in words[:k]]:
+            # A single matching word is usually a coincidence, not the overlap
+            return words[k:] if k >= 2 or k == len(words) else words
+    return words
+
+def stream_transcribe(source, headers=None, window_seconds=Config.SR_WINDOW_SECONDS,
+                      overlap_seconds=Config.SR_OVERLAP_SECONDS, max_workers=Config.SR_MAX_CONCURRENCY):
+    # Recognize windows on up to max_workers threads and yield each window's text in order as soon as it is ready.
+    # At most max_workers windows are in flight, so reading from ffmpeg pauses while recognition catches up.
+    previous_words = []
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for audio in audio_windows(source, headers, window_seconds, overlap_seconds):
+            pending.append(executor.submit(recognize_window, audio))
+            while len(pending) >= max_workers or (pending and pending[0].done()):
+                words = strip_overlap(previous_words, pending.popleft().result())
+                previous_words = (previous_words + words)[-50:]
+                if words:
+                    yield " ".join(words)
+        while pending:
+            words = strip_overlap(previous_words, pending.popleft().result())
+            previous_words = (previous_words + words)[-50:]
+            if words:
+                yield " ".join(words)
+
+def transcribe_audio(audio_file):
+    if isinstance(audio_file, sr.AudioData):
+        text = recognize_window(audio_file)
+        if not text:
+            print("Speech recognition could not understand the audio")
+        return text
+    return " ".join(stream_transcribe(audio_file))
 
 def youtube_to_text(video_url):
-    audio_file = "temp_audio.wav"
-    
-    # Download audio from YouTube video
-    download_audio(video_url, audio_file)
-    
-    # Transcribe the audio
-    transcript = transcribe_audio(audio_file)
-    
-    # Clean up temporary audio file
-    os.remove(audio_file)
+    # Decode the stream through an ffmpeg pipe (no temporary WAV) and print the text as it is recognized
+    audio_url, headers = resolve_audio_source(video_url)
+    parts = []
+    for text in stream_transcribe(audio_url, headers):
+        print(text)
+        parts.append(text)
     
-    return transcript
+    return " ".join(parts)
 
 # Example usage
 video_url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"  # Replace with your YouTube video URL
@@ -0,0 +1,69 @@
+import math
+import numpy as np
+from typing import List, Tuple
+
+def speech_frames(audio: np.ndarray, frame_size: int, threshold_db: float = 10.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Energy-based voice-activity detection.
+
+    Args:
+        audio: Mono float32 samples.
+        frame_size: Samples per analysis frame.
+        threshold_db: How far above the noise floor (10th percentile frame energy) counts as speech.
+
+    Returns:
+        Tuple of (per-frame energy in dB, per-frame speech flags).
+    """
+    n_frames = len(audio) // frame_size
+    frames = audio[:n_frames * frame_size].reshape(n_frames, frame_size)
+    energy_db = 10 * np.log10(np.mean(frames.astype('float32') ** 2, axis=1) + 1e-10)
+    noise_floor = np.percentile(energy_db, 10) if n_frames else 0.0
+    return energy_db, energy_db > noise_floor + threshold_db
+
+def split_on_silence(audio: np.ndarray, sample_rate: int = 16000, target_seconds: float = 60,
+                     max_seconds: float = None, frame_ms: int = 30, min_silence_ms: int = 300) -> List[Tuple[int, int]]:
+    """
+    Split audio into chunks of roughly target_seconds, cutting inside pauses so no word is split.
+
+    Args:
+        audio: Mono float32 samples.
+        sample_rate: Sample rate of audio.
+        target_seconds: Preferred chunk length; the first pause after it is used as the cut.
+        max_seconds: Hard upper bound on a chunk (defaults to 1.5x target). Without a pause
+            in range, the quietest frame is used.
+        frame_ms: Analysis frame length.
+        min_silence_ms: Shortest pause that counts as a cut candidate.
+
+    Returns:
+        List of (start_sample, end_sample) covering the whole input in order.
+    """
+    max_seconds = max_seconds or target_seconds * 1.5
+    if len(audio) <= max_seconds * sample_rate:
+        return [(0, len(audio))]
+
+    frame_size = int(sample_rate * frame_ms / 1000)
+    energy_db, speech = speech_frames(audio, frame_size)
+    n_frames = len(speech)
+    target_frames = int(target_seconds * 1000 / frame_ms)
+    max_frames = int(max_seconds * 1000 / frame_ms)
+
+    # Centres of every pause long enough to cut in
+    edges = np.diff(np.concatenate([[0], (~speech).astype(np.int8), [0]]))
+    run_starts, run_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    min_run = math.ceil(min_silence_ms / frame_ms)
+    pauses = np.array([(s + e) // 2 for s, e in zip(run_starts, run_ends) if e - s >= min_run], dtype=np.int64)
+
+    cuts = []
+    position = 0
+    while n_frames - position > max_frames:
+        candidates = pauses[(pauses >= position + target_frames) & (pauses <= position + max_frames)]
+        if len(candidates):
+            cut = int(candidates[0])
+        else:
+            window = energy_db[position + target_frames:position + max_frames]
+            cut = position + target_frames + int(np.argmin(window))
+        cuts.append(cut)
+        position = cut
+
+    bounds = [0] + [cut * frame_size for cut in cuts] + [len(audio)]
+    return list(zip(bounds[:-1], bounds[1:]))
@@ -1,34 +1,11 @@
 import json
-import yt_dlp
-import whisper
-
-def download_audio(youtube_url, output_template):
-    """
-    Downloads the audio from the provided YouTube URL using yt-dlp.
-    
-    Parameters:
-        youtube_url (str): The URL of the YouTube video.
-        output_template (str): Template for the output file, e.g., "audio.%(ext)s".
-        
-    Returns:
-        str: The actual filename of the downloaded audio.
-    """
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'outtmpl': output_template,
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',  # Use a valid audio codec.
-            'preferredquality': '192',
-        }],
-        'quiet': False,
-    }
-    print("Downloading audio using yt-dlp...")
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        ydl.download([youtube_url])
-    # The output template is like "audio.%(ext)s", so replace %(ext)s with 'mp3'
-    final_filename = output_template.replace('%(ext)s', 'mp3')
-    return final_filename
+from model.asr import get_asr_backend
+from model.audio_stream import probe_audio_source
+from model.config import Config
+from model.rag import RAGSystem, get_rag_system, register_rag_system
+from model.transcript_cache import transcript_cache
+from model.transcription_service import get_transcription_service, stream_segments
+from model.youtube_transcriber import extract_video_id, save_transcript
 
 def group_transcript_by_minute(segments):
     """
@@ -53,30 +30,123 @@ def group_transcript_by_minute(segments):
     
     return transcript_by_minute
 
-def main_video(youtube_url):
-    # youtube_url = input("Enter YouTube URL: ").strip()
-    # Set the output template with a placeholder for the extension.
-    output_template = "audio.%(ext)s"
+def stream_minutes(segments):
+    """
+    Streaming counterpart of group_transcript_by_minute: yields each minute as soon as it is complete.
     
-    # Download audio from YouTube and get the actual filename.
-    audio_file = download_audio(youtube_url, output_template)
-    print("Audio downloaded as", audio_file)
+    Parameters:
+        segments (iterable): Segments in time order, each a dict with 'start' and 'text'.
+        
+    Yields:
+        tuple: (minute index, concatenated text of that minute).
+    """
+    current_minute, texts = None, []
+    for segment in segments:
+        minute_index = int(segment["start"] // 60)
+        if current_minute is not None and minute_index != current_minute:
+            yield current_minute, " ".join(texts)
+            texts = []
+        current_minute = minute_index
+        texts.append(segment["text"].strip())
+    if current_minute is not None:
+        yield current_minute, " ".join(texts)
+
+def _no_progress(stage, percent=None):
+    pass
+
+def transcribe_and_index(youtube_url, video_id, backend, progress=_no_progress):
+    """
+    Transcribes a video, embedding and indexing each minute as it is produced.
     
-    # Load the Whisper model (choose model size as needed: tiny, base, small, medium, large)
-    print("Loading Whisper model...")
-    model = whisper.load_model("base")
+    Parameters:
+        youtube_url (str): The URL of the YouTube video.
+        video_id (str): Its video ID.
+        backend (ASRBackend): Speech recognizer used when no transcription pool is running.
+        progress (callable): Called as progress(stage, percent) with stage "downloading",
+            "transcribing" (percent of the audio done) or "indexing".
     
-    # Transcribe the audio file
-    print("Transcribing audio...")
-    result = model.transcribe(audio_file)
-    segments = result.get("segments", [])
+    Returns:
+        list: The segments ('start', 'end', 'text') of the whole video.
+    """
+    # Decode the audio stream straight from YouTube through an ffmpeg pipe: no file is written
+    progress("downloading")
+    source = probe_audio_source(youtube_url)
+    audio_url, headers, duration = source["url"], source["headers"], source["duration"]
+    print("Streaming audio for", video_id)
     
-    # Group the transcription into minute-wise segments
-    transcript_by_minute = group_transcript_by_minute(segments)
+    # Transcribe on warm pool workers, or in-process with the configured ASR backend (Config.ASR_BACKEND)
+    service = get_transcription_service()
+    if service:
+        segments = service.stream_parallel(audio_url, headers=headers)
+    else:
+        segments = stream_segments(backend, audio_url, headers=headers)
     
-    # Save the result into a JSON file
-    output_json = r"A:\Projects\Edu_Pro\backend\data\single.json"
-    with open(output_json, "w", encoding="utf-8") as f:
-        json.dump(transcript_by_minute, f, ensure_ascii=False, indent=4)
+    # Keep the segments for the transcript cache as they pass through
+    collected = []
+    def record(segments):
+        for segment in segments:
+            collected.append({"start": segment["start"], "end": segment["end"], "text": segment["text"]})
+            if duration:
+                progress("transcribing", min(100.0, 100.0 * segment["end"] / duration))
+            yield segment
+    
+    # Transcribe, group into minutes and index in one pass
+    print("Transcribing audio...")
+    progress("transcribing", 0.0)
+    json_path = Config.transcript_path(video_id)
+    rag = RAGSystem(json_path, load=False)
+    transcript_by_minute = {}
+    batch = []
+    for minute, text in stream_minutes(record(segments)):
+        transcript_by_minute[minute] = text
+        batch.append({"content": text, "metadata": {"id": str(minute)}})
+        if len(batch) >= Config.INGEST_BATCH_SIZE:
+            rag.add_documents(batch)
+            batch = []
+    if batch:
+        rag.add_documents(batch)
+    
+    # Save the result into the video's JSON file
+    output_json = save_transcript(video_id, json.dumps(transcript_by_minute, ensure_ascii=False, indent=4))
     print("Transcript saved to", output_json)
 
+    # Re-reading the saved file yields the same chunk ids, so this only persists the index
+    progress("indexing")
+    rag.refresh()
+    register_rag_system(json_path, rag)
+    return collected
+
+def main_video(youtube_url, progress=_no_progress):
+    """
+    Transcribes a YouTube video and saves the minute-grouped transcript under its video ID.
+    A video already transcribed with the same ASR backend and model is served from the transcript cache without
+    downloading or transcribing it again. The video's RAG index is query-ready as soon as this returns.
+    
+    Parameters:
+        youtube_url (str): The URL of the YouTube video.
+        progress (callable): Receives progress(stage, percent) updates, see transcribe_and_index.
+    
+    Returns:
+        str: The video ID the transcript was saved under.
+    """
+    # youtube_url = input("Enter YouTube URL: ").strip()
+    video_id = extract_video_id(youtube_url)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL. Could not extract video ID.")
+
+    # Held for the whole job, so a concurrent request for the same video waits for this transcript instead of redoing it
+    backend = get_asr_backend()
+    with transcript_cache.lock(video_id, backend.name, backend.model_id):
+        segments = transcript_cache.get(video_id, backend.name, backend.model_id)
+        if segments is None:
+            segments = transcribe_and_index(youtube_url, video_id, backend, progress)
+            transcript_cache.put(video_id, backend.name, segments, backend.model_id)
+            return video_id
+
+        print("Using cached transcript for", video_id)
+        progress("indexing")
+        output_json = save_transcript(video_id, json.dumps(group_transcript_by_minute(segments), ensure_ascii=False, indent=4))
+        print("Transcript saved to", output_json)
+        # Loads the persisted index when it still matches the transcript, so nothing is re-encoded either
+        get_rag_system(Config.transcript_path(video_id))
+        return video_id
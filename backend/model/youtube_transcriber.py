@@ -1,9 +1,17 @@
-import json
 import os
+import threading
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api.formatters import JSONFormatter
 from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound, TooManyRequests
 import re
+from model.bulk_ingest import bulk_ingest
+from model.caption_compaction import compact_captions
+from model.config import Config
+from model.transcript_cache import transcript_cache
+from model.transcript_store import TranscriptStore
+
+# Written by older versions of get_transcript_all; imported into the transcript store once
+LEGACY_MULTI_PATH = 'data/multi.json'
 
 def extract_video_id(link):
     """
@@ -12,6 +20,21 @@ def extract_video_id(link):
     match = re.search(r"(?:v=|youtu\.be/)([a-zA-Z0-9_-]{11})", link)
     return match.group(1) if match else None
 
+def save_transcript(video_id, json_text):
+    """
+    Writes a transcript to its per-video file, plus the shared single.json for callers not yet passing video IDs.
+    Files are replaced atomically so a concurrent RAG load never reads a half-written transcript.
+    """
+    paths = [Config.transcript_path(video_id), Config.SINGLE_TRANSCRIPT_PATH]
+    for path in paths:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per writer, so concurrent saves of the same video never share a temp file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(json_text)
+        os.replace(tmp_path, path)
+    return paths[0]
+
 def get_transcript_one(video_link):
     try:
         # Extract video ID
@@ -21,11 +44,19 @@ def get_transcript_one(video_link):
             raise ValueError("Invalid YouTube URL. Could not extract video ID.")
 
         print(f"Fetching transcript for video: {video_id}")
-        transcript = YouTubeTranscriptApi.get_transcript(video_id)
+        # Served from the transcript cache when this video's captions were fetched before
+        transcript = transcript_cache.get_or_create(
+            video_id, "captions",
+            lambda: YouTubeTranscriptApi.get_transcript(video_id, languages=[Config.CAPTION_LANGUAGE]),
+            language=Config.CAPTION_LANGUAGE)
+        # The cache keeps the raw captions; what gets indexed is the de-duplicated, re-chunked version
+        if Config.CAPTION_COMPACTION:
+            compacted = compact_captions(transcript)
+            print(f"Compacted {len(transcript)} caption lines into {len(compacted)} chunks")
+            transcript = compacted
         formatter = JSONFormatter()
         json_formatted = formatter.format_transcript(transcript)
-        with open(r"A:\Projects\Edu_Pro\backend\data\single.json", "w", encoding="utf-8") as file:
-            file.write(json_formatted)
+        save_transcript(video_id, json_formatted)
         print(f"✅ Single transcript generated successfully for video: {video_id}")
         return json_formatted
 
@@ -49,42 +80,26 @@ def get_transcript_one(video_link):
         print(f"❌ Unexpected error: {e}")
         return None
 
-def get_transcript_all(video_ids):
-    json_file_path = 'data/multi.json'
-    
-    try:
-        if os.path.exists(json_file_path):
-            with open(json_file_path, 'r', encoding='utf-8') as file:
-                transcripts = json.load(file)
-                if not isinstance(transcripts, list):
-                    transcripts = []
-        else:
-            transcripts = []
-    except (FileNotFoundError, json.JSONDecodeError):
-        transcripts = []
+def get_transcript_all(video_ids, store=None, refetch=False):
+    """
+    Fetches captions for many videos into the append-only transcript store, concurrently and
+    under a shared rate limit (see bulk_ingest). An interrupted run resumes where it stopped.
     
-    formatter = JSONFormatter()
+    Parameters:
+        video_ids (list): YouTube video IDs.
+        store (TranscriptStore): Target store; defaults to the one at Config.TRANSCRIPT_DB_PATH.
+        refetch (bool): Fetch videos that are already stored again instead of skipping them.
     
-    for video_id in video_ids:
-        try:
-            print(f"Fetching transcript for video: {video_id}")
-            transcript = YouTubeTranscriptApi.get_transcript(video_id)
-            json_formatted = json.loads(formatter.format_transcript(transcript))
-            transcripts.extend(json_formatted)
-
-            print(f"✅ Transcript added for video: {video_id}")
-
-        except TranscriptsDisabled:
-            print(f"❌ Error: Transcripts are disabled for video {video_id}. Skipping...")
-        except NoTranscriptFound:
-            print(f"❌ Error: No transcript found for video {video_id}. Skipping...")
-        except TooManyRequests:
-            print("❌ Error: Too many requests. Please wait and try again later.")
-            break
-        except Exception as e:
-            print(f"❌ Unexpected error for video {video_id}: {e}. Skipping...")
-
-    with open(json_file_path, 'w', encoding='utf-8') as json_file:
-        json.dump(transcripts, json_file, ensure_ascii=False, indent=4)
+    Returns:
+        dict: Ingestion summary from bulk_ingest.
+    """
+    store = store or TranscriptStore()
+    # One-time migration of the old rewrite-everything file
+    if os.path.exists(LEGACY_MULTI_PATH) and not store.has_video("legacy"):
+        imported = store.import_legacy_json(LEGACY_MULTI_PATH)
+        print(f"Migrated {imported} segments from {LEGACY_MULTI_PATH}")
     
-    print("✅ Multi transcript JSON updated successfully!")
+    summary = bulk_ingest(video_ids, store=store, refetch=refetch)
+    print(f"✅ Transcript store updated: {summary['fetched']} fetched, {summary['skipped']} already stored, "
+          f"{len(summary['failed'])} failed, {len(summary['throttled'])} still throttled")
+    return summary
@@ -0,0 +1,103 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import pytest
+
+pytest.importorskip("youtube_transcript_api")
+
+from model.bulk_ingest import HttpCaptionFetcher, bulk_ingest
+from model.config import Config
+from model.transcript_store import TranscriptStore
+
+CAPTIONS = {
+    "v1": [{"text": "hello", "start": 0.0, "duration": 1.5}, {"text": "world", "start": 1.5, "duration": 2.0}],
+    "v2": [{"text": "second video", "start": 0.0, "duration": 3.0}],
+}
+
+class CaptionServer:
+    """Stub caption service: answers 429 to the first throttle_first requests for a video, then its captions (404 if unknown)."""
+
+    def __init__(self, throttle_first):
+        self.throttle_first = throttle_first
+        self.requests = {}
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                video_id = urlparse(self.path).path.rsplit("/", 1)[-1]
+                with server.lock:
+                    seen = server.requests.get(video_id, 0)
+                    server.requests[video_id] = seen + 1
+                if seen < server.throttle_first.get(video_id, 0):
+                    self.send_error(429)
+                elif video_id not in CAPTIONS:
+                    self.send_error(404)
+                else:
+                    body = json.dumps(CAPTIONS[video_id]).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(Config, "CAPTION_BACKOFF_SECONDS", 0.01)
+
+@pytest.fixture
+def store(tmp_path):
+    store = TranscriptStore(str(tmp_path / "transcripts.db"))
+    yield store
+    store.close()
+
+def ingest(server, store, video_ids, max_retries=3):
+    return bulk_ingest(video_ids, store=store, fetch=HttpCaptionFetcher(server.url, timeout=5),
+                       workers=2, rate=100, burst=10, max_retries=max_retries)
+
+def test_retries_throttled_videos_and_records_failures(store):
+    with CaptionServer(throttle_first={"v1": 1}) as server:
+        summary = ingest(server, store, ["v1", "v2", "missing"])
+
+    assert summary == {"fetched": 2, "skipped": 0, "failed": {"missing": "TranscriptUnavailable"}, "throttled": []}
+    assert server.requests == {"v1": 2, "v2": 1, "missing": 1}
+    assert store.load("v1") == CAPTIONS["v1"]
+    assert store.load("v2") == CAPTIONS["v2"]
+    assert sorted(store.video_ids()) == ["v1", "v2"]
+    assert store.failed_ids() == {"missing": "TranscriptUnavailable"}
+
+def test_second_run_skips_finished_videos(store):
+    with CaptionServer(throttle_first={"v1": 1}) as server:
+        ingest(server, store, ["v1", "v2", "missing"])
+        requests = dict(server.requests)
+        summary = ingest(server, store, ["v1", "v2", "missing"])
+
+    assert summary == {"fetched": 0, "skipped": 3, "failed": {}, "throttled": []}
+    assert server.requests == requests
+
+def test_videos_still_throttled_are_fetched_again_next_run(store):
+    with CaptionServer(throttle_first={"v1": 3}) as server:
+        first = ingest(server, store, ["v1", "v2"], max_retries=1)
+        second = ingest(server, store, ["v1", "v2"], max_retries=1)
+
+    assert first["throttled"] == ["v1"]
+    assert not store.failed_ids()
+    assert second == {"fetched": 1, "skipped": 1, "failed": {}, "throttled": []}
+    assert server.requests == {"v1": 4, "v2": 1}
+    assert store.load("v1") == CAPTIONS["v1"]
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta
+from bson import ObjectId
+import pytest
+from pymongo.errors import AutoReconnect
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from model.chat_store import ChatWriteBehind
+
+class RecordingMessages:
+    """chat_messages that records each insert_many batch; the first lose_acks calls write but then raise,
+    like a write whose acknowledgement is lost to a dropped connection."""
+
+    def __init__(self, collection, lose_acks=0):
+        self.collection = collection
+        self.lose_acks = lose_acks
+        self.batches = []
+
+    async def insert_many(self, documents, ordered=True):
+        self.batches.append(len(documents))
+        await self.collection.insert_many(documents, ordered=ordered)
+        if self.lose_acks:
+            self.lose_acks -= 1
+            raise AutoReconnect("connection closed before the acknowledgement")
+
+class ChatDB:
+    def __init__(self, lose_acks=0):
+        db = mongomock_motor.AsyncMongoMockClient()["chat_test"]
+        self.chat_history = db.chat_history
+        self.chat_messages = RecordingMessages(db.chat_messages, lose_acks)
+
+def turns(chat_name, count, start=datetime(2026, 1, 1)):
+    return [{"_id": ObjectId(), "chat_name": chat_name, "human": f"question {i}", "AI": f"answer {i}",
+             "timestamp": start + timedelta(seconds=i)} for i in range(count)]
+
+def test_turns_are_written_in_batches():
+    async def run():
+        db = ChatDB()
+        writer = ChatWriteBehind(db, batch_size=3, flush_ms=200)
+        for turn in turns("a", 5) + turns("b", 2):
+            await writer.enqueue(turn)
+        await writer.flush()
+        assert not writer.has_pending("a") and not writer.has_pending("b")
+        await writer.close()
+        return db, writer
+
+    db, writer = asyncio.run(run())
+    assert db.chat_messages.batches == [3, 3, 1]
+    assert writer.written == 7 and writer.dropped == 0
+
+    async def check():
+        assert await db.chat_messages.collection.count_documents({}) == 7
+        sessions = {s["chat_name"]: s["timestamp"] async for s in db.chat_history.find({})}
+        # Each session carries the time of its latest turn
+        assert sessions == {"a": datetime(2026, 1, 1, 0, 0, 4), "b": datetime(2026, 1, 1, 0, 0, 1)}
+    asyncio.run(check())
+
+def test_retry_after_lost_acknowledgement_skips_duplicate_ids():
+    async def run():
+        db = ChatDB(lose_acks=1)
+        writer = ChatWriteBehind(db, batch_size=10, flush_ms=50)
+        for turn in turns("a", 4):
+            await writer.enqueue(turn)
+        await writer.close()
+        return db, writer, await db.chat_messages.collection.count_documents({})
+
+    db, writer, stored = asyncio.run(run())
+    # The retry re-sends the batch; its turns keep their _id, so the duplicates are rejected and nothing doubles
+    assert db.chat_messages.batches == [4, 4]
+    assert stored == 4
+    assert writer.written == 4 and writer.dropped == 0
+
+def test_close_writes_everything_still_queued():
+    async def run():
+        db = ChatDB()
+        # A long flush window: without close() draining the queue, the last batch would still be waiting
+        writer = ChatWriteBehind(db, batch_size=50, flush_ms=60_000)
+        for turn in turns("a", 120):
+            await writer.enqueue(turn)
+        assert writer.has_pending("a")
+        await writer.close()
+        return db, writer, await db.chat_messages.collection.count_documents({})
+
+    db, writer, stored = asyncio.run(run())
+    assert stored == 120
+    assert writer.written == 120 and not writer.has_pending("a")